@@ -0,0 +1,54 @@
+"""
+Бенчмарк импорта экспортов трекеров времени через реестр источников (adapters).
+
+Для каждого зарегистрированного источника печатает скорость импорта
+(строк в секунду), затем сравнивает последовательный импорт всех
+источников с одновременным (import_sources).
+
+Запуск: python benchmarks/bench_adapters_ingest.py [лет] [строк_в_год]
+"""
+import os
+import sys
+import tempfile
+
+from synthetic import make_atimelogger_export, make_touchtime_export, timeit
+
+from modules.timedata.adapters import ADAPTERS, import_source, import_sources
+
+# Генераторы синтетических экспортов для каждого источника
+EXPORTS = {
+    'TouchTime': make_touchtime_export,
+    'aTimeLogger': make_atimelogger_export,
+}
+
+
+def main(years=3, rows_per_year=100000):
+    with tempfile.TemporaryDirectory() as folder:
+        year_range = range(2020, 2020 + years)
+        jobs = []
+        for name in ADAPTERS:
+            if name not in EXPORTS:
+                print(f"{name}: нет генератора синтетического экспорта, пропускаем")
+                continue
+            path = os.path.join(folder, f'{name}.csv')
+            EXPORTS[name](year_range, rows_per_year).to_csv(path, index=False)
+            jobs.append((name, path))
+
+        rows = years * rows_per_year
+        results = {}
+        for name, path in jobs:
+            results[name] = timeit(lambda: import_source(name, path, os.path.join(folder, 'out')), repeat=1)
+        sequential = sum(results.values())
+        concurrent = timeit(lambda: import_sources(jobs, os.path.join(folder, 'out'), max_workers=len(jobs)),
+                            repeat=1)
+
+        print()
+        print(f"Лет: {years}, строк в год: {rows_per_year}")
+        for name, seconds in results.items():
+            print(f"{name:>12}: {seconds:.2f} с, {rows / seconds:.0f} строк/с")
+        print(f"все последовательно: {sequential:.2f} с")
+        print(f"все одновременно:    {concurrent:.2f} с")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
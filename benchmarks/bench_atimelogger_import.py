@@ -0,0 +1,88 @@
+"""
+Бенчмарк импорта экспорта aTimeLogger в файлы time_YYYY_1.csv.
+
+Сравнивает потоковый импорт кусками с прежним (весь экспорт в памяти,
+strptime на каждую строку, фильтрация всего файла на каждый год):
+время, строк в секунду и пиковую память (tracemalloc). Проверяет, что
+файлы получаются одинаковыми.
+
+Запуск: python benchmarks/bench_atimelogger_import.py [лет] [строк_в_год]
+"""
+import filecmp
+import os
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from synthetic import make_atimelogger_export, timeit
+
+from modules.timedata.aTimeLogger_api import create_temp_timedata_from_aTimeLogger
+
+
+def legacy_import(file, output_dir):
+    """Прежний create_temp_timedata_from_aTimeLogger"""
+    def timeToDay(x):
+        return datetime.strptime(x, u'%Y-%m-%d %H:%M')
+
+    def add_group(x):
+        if len(x) == 0:
+            return ""
+        return x + ":"
+
+    df = pd.read_csv(file, on_bad_lines="warn", sep=",")
+    df = df.fillna('')
+    df['Start'] = df['Начало'].apply(lambda x: timeToDay(x))
+    df['End'] = df['Конец'].apply(lambda x: timeToDay(x))
+    df['Group'] = df["Group"].apply(lambda x: add_group(x))
+    df['Group'] = df['Group'] + df["Group.1"]
+    df['Activity'] = df['Group'] + ":" + df['Тип']
+    df['Total'] = ((df['End']-df['Start']).dt.total_seconds() / 60).astype(int)
+    df = df.drop(columns=["Комментарий", "Тип", "Начало",
+                          "Конец", "Продолжительность", "Group", "Group.1"])
+    for year in df['Start'].dt.year.unique():
+        dfy = df[df['Start'].dt.year == year]
+        dfy.to_csv(os.path.join(output_dir, f'time_{year}_1.csv'))
+
+
+def peak_memory(func):
+    """Пиковая память Python-аллокаций при выполнении func, МБ"""
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def main(years=5, rows_per_year=100000):
+    with tempfile.TemporaryDirectory() as folder:
+        export = os.path.join(folder, 'export.csv')
+        make_atimelogger_export(range(2020, 2020 + years), rows_per_year).to_csv(export, index=False)
+        legacy_dir, new_dir = os.path.join(folder, 'legacy'), os.path.join(folder, 'new')
+        os.makedirs(legacy_dir)
+
+        legacy = timeit(lambda: legacy_import(export, legacy_dir), repeat=1)
+        streaming = timeit(lambda: create_temp_timedata_from_aTimeLogger(export, new_dir), repeat=1)
+        legacy_memory = peak_memory(lambda: legacy_import(export, legacy_dir))
+        streaming_memory = peak_memory(lambda: create_temp_timedata_from_aTimeLogger(export, new_dir))
+
+        # Сравниваем только файлы частей: рядом лежит еще файл водяных знаков (import_state.json)
+        def part_files(output_dir):
+            return sorted(name for name in os.listdir(output_dir) if name.startswith('time_') and name.endswith('.csv'))
+
+        names = part_files(legacy_dir)
+        same = names == part_files(new_dir) and all(
+            filecmp.cmp(os.path.join(legacy_dir, name), os.path.join(new_dir, name), shallow=False)
+            for name in names)
+
+        rows = years * rows_per_year
+        print()
+        print(f"Строк: {rows}, файлов: {len(names)}, совпадают: {same}")
+        print(f"прежний импорт:  {legacy:.2f} с, {rows / legacy:.0f} строк/с, пик памяти {legacy_memory:.0f} МБ")
+        print(f"потоковый:       {streaming:.2f} с, {rows / streaming:.0f} строк/с, пик памяти {streaming_memory:.0f} МБ")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
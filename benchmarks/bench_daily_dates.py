@@ -0,0 +1,53 @@
+"""
+Бенчмарк разбора дат DailyData.
+
+Сравнивает прежнюю цепочку pd.to_datetime (mixed + dayfirst, mixed,
+общий парсер) с определением форматов по выборке и разбором групп
+с явным форматом. Проверяет, что результаты совпадают.
+
+Запуск: python benchmarks/bench_daily_dates.py [лет]
+"""
+import sys
+import warnings
+
+import pandas as pd
+
+from synthetic import timeit
+
+from modules.dailydata.DailyData import parse_dates
+
+
+def legacy_parse(date_series):
+    """Прежний разбор дат из DailyData.__init__"""
+    parsed = pd.to_datetime(date_series, format='mixed', dayfirst=True, errors='coerce')
+    mask_na = parsed.isna()
+    if mask_na.any():
+        parsed2 = pd.to_datetime(date_series[mask_na], format='mixed', dayfirst=False, errors='coerce')
+        parsed.loc[mask_na] = parsed2
+    mask_na = parsed.isna()
+    if mask_na.any():
+        parsed3 = pd.to_datetime(date_series[mask_na], errors='coerce')
+        parsed.loc[mask_na] = parsed3
+    return parsed
+
+
+def main(years=10):
+    warnings.simplefilter('ignore', UserWarning)
+    dates = pd.date_range(pd.Timestamp(2024 - years, 1, 1), pd.Timestamp(2023, 12, 31), freq='D')
+    cases = {
+        'data2 (%d.%m.%y)': pd.Series(dates.strftime('%d.%m.%y')),
+        'ISO (%Y-%m-%d)': pd.Series(dates.strftime('%Y-%m-%d')),
+        '%d.%m.%Y': pd.Series(dates.strftime('%d.%m.%Y')),
+        'смешанные': pd.Series(dates.strftime('%d.%m.%y')).where(dates.day % 3 != 0, dates.strftime('%Y-%m-%d')),
+    }
+    print(f"Дат: {len(dates)}")
+    for name, series in cases.items():
+        same = parse_dates(series).equals(legacy_parse(series))
+        legacy = timeit(lambda: legacy_parse(series))
+        detected = timeit(lambda: parse_dates(series))
+        print(f"{name:>18}: прежний {legacy * 1000:7.1f} мс, с форматами {detected * 1000:6.1f} мс, "
+              f"совпадают: {same}")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,72 @@
+"""
+Бенчмарк загрузки ежедневных данных (data_YYYY.csv + data2_YYYY.csv).
+
+Сравнивает прежний путь (слияние, запись во временный файл и повторный
+разбор) с объединением источников в памяти внутри DailyData. Печатает
+время загрузки и пиковое потребление памяти (tracemalloc).
+
+Запуск: python benchmarks/bench_daily_load.py [лет]
+"""
+import os
+import sys
+import tempfile
+import tracemalloc
+import pandas as pd
+
+from synthetic import make_time_log, make_daily_data, timeit
+
+from modules.DataManager import DataManager
+from modules.dailydata.DailyData import DailyData
+
+
+def legacy_load(daily_file, data2_file):
+    """Прежний путь: слияние, NamedTemporaryFile и повторный разбор csv"""
+    temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False)
+    temp_file.close()
+    merged_df = pd.merge(pd.read_csv(daily_file), pd.read_csv(data2_file), on='Date', how='outer')
+    merged_df.to_csv(temp_file.name, index=False)
+    data = DailyData(temp_file.name)
+    os.remove(temp_file.name)
+    return data
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def main(years=5):
+    with tempfile.TemporaryDirectory() as folder:
+        manager = DataManager(folder)
+        sources = []
+        for year in range(2020, 2020 + years):
+            daily_file = os.path.join(folder, f'data_{year}.csv')
+            data2_file = os.path.join(folder, f'data2_{year}.csv')
+            time_file = os.path.join(folder, f'time_{year}.csv')
+            make_daily_data(year).to_csv(daily_file, index=False)
+            make_time_log([year], 5000).to_csv(time_file)
+            manager._generate_data2_file(time_file, data2_file, year)
+            sources.append((daily_file, data2_file))
+
+        def load_legacy():
+            for daily_file, data2_file in sources:
+                legacy_load(daily_file, data2_file)
+
+        def load_in_memory():
+            for daily_file, data2_file in sources:
+                DailyData([daily_file, data2_file])
+
+        for daily_file, data2_file in sources:
+            pd.testing.assert_frame_equal(legacy_load(daily_file, data2_file).df,
+                                          DailyData([daily_file, data2_file]).df)
+
+        print(f"Лет: {years}")
+        print(f"через временный файл: {timeit(load_legacy):.3f} с, пик памяти {peak_memory(load_legacy):.1f} МБ")
+        print(f"в памяти:             {timeit(load_in_memory):.3f} с, пик памяти {peak_memory(load_in_memory):.1f} МБ")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,61 @@
+"""
+Бенчмарк генерации data2_YYYY.csv в DataManager.
+
+Сравнивает построение матрицы день x активность одним crosstab с прежним
+циклом по активностям и дням и проверяет, что файлы совпадают побайтно.
+
+Запуск: python benchmarks/bench_data2.py [строк]
+"""
+import os
+import sys
+import tempfile
+import pandas as pd
+
+from synthetic import make_time_log, timeit
+
+from modules.DataManager import DataManager
+
+
+def legacy_generate_data2_file(time_file, data2_file, year):
+    """Прежняя реализация DataManager._generate_data2_file"""
+    time_df = pd.read_csv(time_file)
+    time_df['Start'] = pd.to_datetime(time_df['Start'])
+    time_df['Date'] = time_df['Start'].dt.date
+    time_df['Activity'] = time_df['Activity'].astype(str)
+    work_mask = time_df['Activity'].str.match(r'^Work')
+    time_df.loc[work_mask, 'Activity'] = 'Work'
+    all_activities = time_df['Activity'].unique()
+    all_dates = pd.date_range(start=pd.Timestamp(year, 1, 1), end=pd.Timestamp(year, 12, 31), freq='D')
+    data2_df = pd.DataFrame({'Date': all_dates.strftime('%d.%m.%y')})
+    for activity in all_activities:
+        activity_values = []
+        for date in all_dates:
+            day_records = time_df[time_df['Date'] == date.date()]
+            if len(day_records) > 0 and activity in day_records['Activity'].values:
+                activity_values.append(1)
+            else:
+                activity_values.append(0)
+        data2_df[activity] = activity_values
+    data2_df.to_csv(data2_file, index=False)
+
+
+def main(rows=20000):
+    with tempfile.TemporaryDirectory() as folder:
+        manager = DataManager(folder)
+        time_file = os.path.join(folder, 'time_2024.csv')
+        make_time_log([2024], rows).to_csv(time_file)
+        old_file = os.path.join(folder, 'data2_old.csv')
+        new_file = os.path.join(folder, 'data2_new.csv')
+
+        legacy = timeit(lambda: legacy_generate_data2_file(time_file, old_file, 2024), repeat=1)
+        current = timeit(lambda: manager._generate_data2_file(time_file, new_file, 2024))
+        with open(old_file, 'rb') as old, open(new_file, 'rb') as new:
+            assert old.read() == new.read(), "data2 отличается от прежней реализации"
+
+        print(f"Строк: {rows}")
+        print(f"цикл по дням:   {legacy:.3f} с")
+        print(f"crosstab:       {current:.3f} с (x{legacy / current:.0f}), файлы совпадают побайтно")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
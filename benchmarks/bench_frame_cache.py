@@ -0,0 +1,47 @@
+"""
+Бенчмарк стартовой загрузки DataManager с Feather-кэшем очищенных данных.
+
+Сравнивает загрузку без кэша, холодный старт (кэш строится) и теплый
+старт (данные читаются из кэша), проверяя, что данные совпадают.
+
+Запуск: python benchmarks/bench_frame_cache.py [лет] [строк_в_год]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import pandas as pd
+
+from synthetic import make_statistics_folder, timeit
+
+from modules.DataManager import DataManager
+
+
+def main(years=5, rows_per_year=50000):
+    with tempfile.TemporaryDirectory() as folder:
+        make_statistics_folder(folder, range(2020, 2020 + years), rows_per_year)
+        DataManager(folder, use_cache=False).generate_data2_files()
+        frames = os.path.join(folder, '.cache', 'frames')
+
+        def cold():
+            shutil.rmtree(frames, ignore_errors=True)
+            return DataManager(folder)
+
+        no_cache = timeit(lambda: DataManager(folder, use_cache=False), repeat=1)
+        cold_start = timeit(cold, repeat=1)
+        warm_start = timeit(lambda: DataManager(folder))
+
+        plain, cached = DataManager(folder, use_cache=False), DataManager(folder)
+        for year in plain.available_years:
+            pd.testing.assert_frame_equal(plain.time_data[year].df, cached.time_data[year].df)
+            pd.testing.assert_frame_equal(plain.mood_data[year].data, cached.mood_data[year].data)
+            pd.testing.assert_frame_equal(plain.daily_data[year].df, cached.daily_data[year].df)
+
+        print(f"\nЛет: {years}, строк времени в год: {rows_per_year}")
+        print(f"без кэша:        {no_cache:.2f} с")
+        print(f"холодный старт:  {cold_start:.2f} с")
+        print(f"теплый старт:    {warm_start:.2f} с (x{no_cache / warm_start:.1f})")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,66 @@
+"""
+Бенчмарк ежедневной синхронизации экспорта aTimeLogger.
+
+Сравнивает полный повторный импорт с merge_timedata и инкрементальный импорт,
+который добавляет в time_YYYY.csv только записи новее прошлого импорта.
+Инкрементальный импорт начинается с папки, собранной обычным полным импортом и merge
+(с водяным знаком и без него — как в папках, собранных до появления водяных знаков),
+и проверяет, что записи не задвоились.
+
+Запуск: python benchmarks/bench_incremental_import.py [лет] [строк_в_год] [новых_строк]
+"""
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+from synthetic import make_atimelogger_export, timeit
+
+from modules.timedata.aTimeLogger_api import create_temp_timedata_from_aTimeLogger
+from modules.timedata.merging_timedata import merge_timedata
+
+
+def count_rows(folder, years):
+    """Число записей и повторов (Start, End, Activity) в файлах time_YYYY.csv"""
+    df = pd.concat([pd.read_csv(os.path.join(folder, f'time_{year}.csv')) for year in years])
+    return len(df), int(df.duplicated(['Start', 'End', 'Activity']).sum())
+
+
+def main(years=5, rows_per_year=50000, new_rows=50):
+    with tempfile.TemporaryDirectory() as folder:
+        year_range = list(range(2020, 2020 + years))
+        export = make_atimelogger_export(year_range, rows_per_year)
+        old_export, new_export = os.path.join(folder, 'old.csv'), os.path.join(folder, 'new.csv')
+        export.iloc[:-new_rows].to_csv(old_export, index=False)
+        export.to_csv(new_export, index=False)
+
+        def full_sync(export_file, output_dir):
+            create_temp_timedata_from_aTimeLogger(export_file, output_dir)
+            merge_timedata(years=year_range, parts=[1], folder=output_dir)
+
+        # Папки после обычного полного импорта прошлого экспорта
+        full_dir = os.path.join(folder, 'full')
+        incremental_dir, legacy_dir = os.path.join(folder, 'incremental'), os.path.join(folder, 'legacy')
+        full_sync(old_export, incremental_dir)
+        full_sync(old_export, legacy_dir)
+        os.remove(os.path.join(legacy_dir, 'import_state.json'))
+
+        full = timeit(lambda: full_sync(new_export, full_dir), repeat=1)
+        incremental = timeit(lambda: create_temp_timedata_from_aTimeLogger(new_export, incremental_dir,
+                                                                           incremental=True), repeat=1)
+        legacy = timeit(lambda: create_temp_timedata_from_aTimeLogger(new_export, legacy_dir,
+                                                                      incremental=True), repeat=1)
+        print()
+        print(f"Строк в экспорте: {len(export)}, новых: {new_rows}")
+        print(f"полный импорт + merge:            {full:.2f} с")
+        print(f"инкрементальный:                  {incremental:.2f} с")
+        print(f"инкрементальный без водяного знака: {legacy:.2f} с")
+        for name, output_dir in (('полный', full_dir), ('инкрементальный', incremental_dir),
+                                 ('без водяного знака', legacy_dir)):
+            rows, duplicates = count_rows(output_dir, year_range)
+            print(f"{name:>18}: записей {rows}, повторов {duplicates}")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,38 @@
+"""
+Бенчмарк стартовой загрузки DataManager.load_all_data.
+
+Сравнивает последовательную загрузку с пулом потоков и пулом процессов
+и печатает отчет о времени загрузки каждого набора данных.
+
+Запуск: python benchmarks/bench_load_all.py [лет] [строк_в_год] [потоков]
+"""
+import sys
+import tempfile
+
+from synthetic import make_statistics_folder, timeit
+
+from modules.DataManager import DataManager
+
+
+def main(years=8, rows_per_year=20000, workers=4):
+    with tempfile.TemporaryDirectory() as folder:
+        make_statistics_folder(folder, range(2017, 2017 + years), rows_per_year)
+        DataManager(folder).generate_data2_files()
+
+        serial = timeit(lambda: DataManager(folder), repeat=1)
+        threads = timeit(lambda: DataManager(folder, max_workers=workers), repeat=1)
+        processes = timeit(lambda: DataManager(folder, max_workers=workers, use_processes=True), repeat=1)
+
+        manager = DataManager(folder, max_workers=workers)
+        print()
+        for item in manager.load_report:
+            print(f"{item['year']} {item['dataset']:>6}: {item['seconds']:.3f} с")
+        print()
+        print(f"Лет: {years}, строк времени в год: {rows_per_year}")
+        print(f"последовательно:       {serial:.2f} с")
+        print(f"потоки ({workers}):          {threads:.2f} с")
+        print(f"процессы ({workers}):        {processes:.2f} с")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
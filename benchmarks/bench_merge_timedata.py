@@ -0,0 +1,65 @@
+"""
+Бенчмарк merge_timedata: объединение частей time_YYYY_N.csv от двух трекеров.
+
+Сравнивает потоковое k-way слияние с прежним pd.concat + sort_values
+по времени и пиковой памяти (tracemalloc).
+
+Запуск: python benchmarks/bench_merge_timedata.py [строк_в_части] [частей]
+"""
+import os
+import sys
+import tempfile
+import tracemalloc
+
+import pandas as pd
+
+from synthetic import make_time_log, timeit
+
+from modules.timedata.merging_timedata import merge_timedata
+
+
+def legacy_merge(year, parts, folder):
+    """Прежний merge_timedata для одного года"""
+    cdf = None
+    for part in parts:
+        file = os.path.join(folder, f'time_{year}_{part}.csv')
+        if os.path.isfile(file):
+            df = pd.read_csv(file, on_bad_lines="warn", sep=",")
+            if cdf is not None:
+                cdf = pd.concat([df, cdf])
+            else:
+                cdf = df
+    cdf = cdf.reset_index()
+    cdf = cdf.sort_values('Start')
+    cdf = cdf.drop(columns="Unnamed: 0")
+    cdf = cdf.drop(columns="index")
+    cdf.to_csv(os.path.join(folder, f'legacy_{year}.csv'))
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def main(rows_per_part=100000, parts=2):
+    with tempfile.TemporaryDirectory() as folder:
+        year = 2024
+        for part in range(parts):
+            make_time_log([year], rows_per_part, seed=part).to_csv(os.path.join(folder, f'time_{year}_{part}.csv'))
+
+        part_list = list(range(parts))
+        legacy = timeit(lambda: legacy_merge(year, part_list, folder), repeat=1)
+        streaming = timeit(lambda: merge_timedata([year], part_list, folder), repeat=1)
+        legacy_memory = peak_memory(lambda: legacy_merge(year, part_list, folder))
+        streaming_memory = peak_memory(lambda: merge_timedata([year], part_list, folder))
+
+        print(f"Частей: {parts}, строк в части: {rows_per_part}")
+        print(f"concat + sort:   {legacy:.2f} с, пик памяти {legacy_memory:.0f} МБ")
+        print(f"k-way слияние:   {streaming:.2f} с, пик памяти {streaming_memory:.1f} МБ")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
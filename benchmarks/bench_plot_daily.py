@@ -0,0 +1,69 @@
+"""
+Бенчмарк отрисовки TimeData.plot_daily в зависимости от числа записей.
+
+Сравнивает пакетную отрисовку (одна PolyCollection) с прежним
+вызовом ax.bar на каждую запись.
+
+Запуск: python benchmarks/bench_plot_daily.py [строк ...]
+"""
+import io
+import os
+import sys
+import tempfile
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from synthetic import make_time_log, use_static, timeit
+
+from modules.timedata.TimeData import TimeData
+
+
+def legacy_plot_daily(td):
+    """Прежняя отрисовка plot_daily: по одному ax.bar на запись"""
+    df = td.df_groupped
+    fig, ax = plt.subplots(figsize=(15, 8))
+    unique_dates = sorted(set(df['Start'].dt.date).union(set(df['End'].dt.date)))
+    date_to_num = {date: i for i, date in enumerate(unique_dates)}
+    for idx, row in df.iterrows():
+        color = td.activityInfo.get_activity_color(row['Activity'])
+        start_date, end_date = row['Start'].date(), row['End'].date()
+        start_time = row['Start'].hour + row['Start'].minute / 60
+        end_time = row['End'].hour + row['End'].minute / 60
+        if start_date != end_date:
+            ax.bar(date_to_num[start_date], 24 - start_time, bottom=start_time, width=1.0, color=color, alpha=0.7)
+            ax.bar(date_to_num[end_date], end_time, bottom=0, width=1.0, color=color, alpha=0.7)
+        else:
+            ax.bar(date_to_num[start_date], end_time - start_time, bottom=start_time, width=1.0,
+                   color=color, alpha=0.7)
+    ax.set_ylim(24, 0)
+    ax.set_xticks(range(len(unique_dates)))
+    ax.set_xticklabels([date.strftime('%Y-%m-%d') for date in unique_dates], rotation=45)
+    ax.set_xlim(-0.5, len(unique_dates) - 0.5)
+    plt.tight_layout()
+    return fig
+
+
+def render(build):
+    fig = build()
+    fig.savefig(io.BytesIO(), format='png')
+    plt.close(fig)
+
+
+def main(*row_counts):
+    plt.show = lambda *args, **kwargs: None
+    row_counts = row_counts or (500, 2000, 8000)
+    with tempfile.TemporaryDirectory() as folder:
+        use_static(folder)
+        print(f"{'строк':>8} | {'ax.bar':>9} | {'PolyCollection':>14}")
+        for rows in row_counts:
+            path = os.path.join(folder, f'time_{rows}.csv')
+            make_time_log([2024], rows).to_csv(path)
+            td = TimeData(path)
+            legacy = timeit(lambda: render(lambda: legacy_plot_daily(td)), repeat=1)
+            batched = timeit(lambda: render(td.plot_daily))
+            print(f"{rows:>8} | {legacy:8.2f}с | {batched:13.2f}с")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
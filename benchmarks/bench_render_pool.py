@@ -0,0 +1,70 @@
+"""
+Бенчмарк отрисовки всех графиков дашборда времени за несколько лет.
+
+Сравнивает последовательную отрисовку в одном процессе с пулом ChartRenderPool.
+При достаточном числе ядер время пула близко ко времени самого долгого графика.
+
+Запуск: python benchmarks/bench_render_pool.py [лет] [строк_в_год] [процессов]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from synthetic import make_statistics_folder
+
+import modules.ActivityInfo as activity_info
+from modules.ChartRenderer import ChartRenderPool, render_chart, _init_worker
+from modules.DataManager import DataManager
+
+
+def _init_bench_worker(statistics_folder, cache_folder):
+    """Процессы пула (spawn) не наследуют use_static родителя: подключаем синтетические цвета сами"""
+    static = os.path.join(statistics_folder, 'static')
+    activity_info.ACTIVITIES_FILE = os.path.join(static, 'activities.csv')
+    activity_info.GROUPS_FILE = os.path.join(static, 'groups.csv')
+    _init_worker(statistics_folder, cache_folder)
+
+
+class BenchRenderPool(ChartRenderPool):
+    def _new_executor(self):
+        return ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_bench_worker,
+                                   initargs=(self.statistics_folder, self.cache_folder),
+                                   mp_context=multiprocessing.get_context('spawn'))
+
+
+def main(years=8, rows_per_year=5000, workers=None):
+    workers = workers or os.cpu_count()
+    with tempfile.TemporaryDirectory() as folder:
+        year_range = range(2017, 2017 + years)
+        make_statistics_folder(folder, year_range, rows_per_year)
+        manager = DataManager(folder)
+        jobs = [(('time', year, chart), 'time', year, chart) for year in year_range for chart in ('daily', 'heatmap')]
+
+        slowest = 0.0
+        started = time.perf_counter()
+        for _, kind, year, chart in jobs:
+            chart_started = time.perf_counter()
+            render_chart(manager, kind, year, chart)
+            slowest = max(slowest, time.perf_counter() - chart_started)
+        serial = time.perf_counter() - started
+
+        pool = BenchRenderPool(folder, workers)
+        # Первый проход прогревает процессы (импорт matplotlib, загрузка данных)
+        pool.render_many(jobs)
+        started = time.perf_counter()
+        results = pool.render_many(jobs)
+        parallel = time.perf_counter() - started
+        pool.shutdown()
+
+        errors = [result for result in results.values() if isinstance(result, Exception)]
+        print(f"Лет: {years}, строк времени в год: {rows_per_year}, графиков: {len(jobs)}, ошибок: {len(errors)}")
+        print(f"самый долгий график:   {slowest:.2f} с")
+        print(f"последовательно:       {serial:.2f} с")
+        print(f"пул ({workers} проц.):        {parallel:.2f} с")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
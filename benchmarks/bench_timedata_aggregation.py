@@ -0,0 +1,77 @@
+"""
+Бенчмарк агрегации TimeData по неделям/месяцам и отчета generate_report.
+
+Сравнивает движок на groupby с прежним построчным циклом (iterrows)
+на синтетическом многолетнем журнале.
+
+Запуск: python benchmarks/bench_timedata_aggregation.py [строк_в_год] [лет]
+"""
+import os
+import sys
+import tempfile
+import warnings
+import numpy as np
+import pandas as pd
+
+from synthetic import make_time_log, use_static, timeit
+
+from modules.timedata.TimeData import TimeData
+
+
+def legacy_get_by(td, period, work):
+    """Прежняя реализация get_by_week/get_by_month"""
+    size = 53 if period == 'week' else 12
+    dfy = pd.DataFrame(0, index=np.arange(size), columns=np.hstack([period, td.activities]))
+    dfy[period] = range(1, size + 1)
+    dfy = dfy.set_index(period)
+    dfy["Work"] = 0
+    for index, row in td.df.iterrows():
+        key = row.Start.week if period == 'week' else row.Start.month
+        if "Work" in row.Activity:
+            if not work:
+                continue
+            dfy["Work"].iloc[key - 1] += row.Total
+            continue
+        if row.Activity not in dfy.columns:
+            dfy[row.Activity] = 0
+        dfy[row.Activity].iloc[key - 1] += row.Total
+    dfy = dfy.loc[:, (dfy != 0).any(axis=0)]
+    dfy.iloc[:, :] = dfy.iloc[:, :].div(60, axis=0)
+    return dfy
+
+
+def main(rows_per_year=20000, years=3):
+    warnings.simplefilter('ignore')
+    with tempfile.TemporaryDirectory() as folder:
+        use_static(folder)
+        path = os.path.join(folder, 'time.csv')
+        make_time_log(range(2022, 2022 + years), rows_per_year).to_csv(path)
+        td = TimeData(path)
+
+        print(f"Записей: {len(td.df)}")
+        for period in ('week', 'month'):
+            for work in (True, False):
+                old = legacy_get_by(td, period, work)
+                new, _ = td.get_by_period(period, work)
+                assert list(old.columns) == list(new.columns)
+                assert np.allclose(old.values.astype(float), new.values)
+
+            legacy = timeit(lambda: legacy_get_by(td, period, True), repeat=1)
+            td._period_keys.clear()
+            cold = timeit(lambda: td.get_by_period(period, True), repeat=1)
+            warm = timeit(lambda: td.get_by_period(period, True))
+            print(f"{period:>6}: iterrows {legacy:8.3f} с | groupby {cold:8.4f} с "
+                  f"(ключи закэшированы: {warm:.4f} с) | x{legacy / cold:.0f}")
+
+        def both_views():
+            table = td.report_table()
+            for by in ('week', 'month'):
+                list(td.iter_report_views(table, by))
+
+        report = timeit(lambda: td.generate_report(by='week'))
+        views = timeit(both_views)
+        print(f"generate_report(by='week'): {report:.4f} с | недели и месяцы из одной таблицы: {views:.4f} с")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
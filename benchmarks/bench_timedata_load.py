@@ -0,0 +1,48 @@
+"""
+Бенчмарк загрузки time_YYYY.csv в TimeData.
+
+Сравнивает разбор дат по объявленному формату с прежним разбором
+через datetime.strptime на каждую строку и повторным pd.to_datetime.
+
+Запуск: python benchmarks/bench_timedata_load.py [строк]
+"""
+import os
+import sys
+import tempfile
+import pandas as pd
+
+from synthetic import make_time_log, use_static, timeit
+
+from modules.timedata.TimeData import TimeData, get_fake_time
+
+
+def legacy_parse(path):
+    """Прежний разбор дат из TimeData.__init__"""
+    df = pd.read_csv(path, on_bad_lines="warn", sep=",")
+    df['Start0'] = df['Start'].apply(lambda x: get_fake_time(x, True))
+    df['End0'] = df['End'].apply(lambda x: get_fake_time(x, False))
+    df['Start'] = pd.to_datetime(df['Start'])
+    df['End'] = pd.to_datetime(df['End'])
+    return df
+
+
+def main(rows=100000):
+    with tempfile.TemporaryDirectory() as folder:
+        use_static(folder)
+        path = os.path.join(folder, 'time_2024.csv')
+        make_time_log([2024], rows).to_csv(path)
+
+        old = legacy_parse(path)
+        new = TimeData(path).df
+        for column in ('Start', 'End', 'Start0', 'End0'):
+            assert old[column].equals(new[column]), column
+
+        legacy = timeit(lambda: legacy_parse(path), repeat=1)
+        current = timeit(lambda: TimeData(path))
+        print(f"Строк: {rows}")
+        print(f"strptime + to_datetime: {legacy:.3f} с")
+        print(f"TimeData(path):         {current:.3f} с (x{legacy / current:.1f})")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
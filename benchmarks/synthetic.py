@@ -0,0 +1,141 @@
+"""
+Генераторы синтетических данных для бенчмарков.
+
+Структура файлов повторяет папку "Статистика": time_YYYY.csv,
+mood_YYYY.csv, data_YYYY.csv, а также static/activities.csv и
+static/groups.csv.
+"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, 'src'))
+sys.path.append(ROOT)
+
+from modules.timedata.TimeData import TIME_FORMAT
+
+ACTIVITIES = [
+    'Sleep', 'Work:Project A', 'Work:Meetings', 'Games:Dota', 'Games:Chess',
+    'PetProjects:Clementine', 'Reading', 'Sport:Run', 'Cooking', 'Walk',
+    'Homework', 'Music',
+]
+GROUPS = {'Work': 'navy', 'Games': 'purple', 'PetProjects': 'teal', 'Sport': 'red'}
+
+
+def make_time_log(years, rows_per_year, seed=0) -> pd.DataFrame:
+    """Создает журнал активностей в формате time_YYYY.csv"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for year in years:
+        start_of_year = pd.Timestamp(year, 1, 1)
+        minutes = np.sort(rng.integers(0, 365 * 24 * 60, rows_per_year))
+        durations = rng.integers(5, 240, rows_per_year)
+        start = start_of_year + pd.to_timedelta(minutes, unit='m')
+        end = start + pd.to_timedelta(durations, unit='m')
+        frames.append(pd.DataFrame({
+            'Start': start.strftime(TIME_FORMAT),
+            'End': end.strftime(TIME_FORMAT),
+            'Activity': rng.choice(ACTIVITIES, rows_per_year),
+            'Total': durations,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def make_touchtime_export(years, rows_per_year, seed=0) -> pd.DataFrame:
+    """Создает экспорт TouchTime (с пустым безымянным столбцом в конце, как в реальных выгрузках)"""
+    log = make_time_log(years, rows_per_year, seed).drop(columns='Total')
+    log['Unnamed: 3'] = ''
+    return log
+
+
+def make_atimelogger_export(years, rows_per_year, seed=0) -> pd.DataFrame:
+    """Создает экспорт aTimeLogger (русская локаль, даты до минут)"""
+    log = make_time_log(years, rows_per_year, seed)
+    start = pd.to_datetime(log['Start'], format=TIME_FORMAT)
+    end = pd.to_datetime(log['End'], format=TIME_FORMAT)
+    parts = log['Activity'].str.rpartition(':')
+    return pd.DataFrame({
+        'Тип': parts[2],
+        'Продолжительность': (end - start).dt.total_seconds().div(60).astype(int),
+        'Начало': start.dt.strftime('%Y-%m-%d %H:%M'),
+        'Конец': end.dt.strftime('%Y-%m-%d %H:%M'),
+        'Комментарий': '',
+        'Group': parts[0],
+        'Group.1': '',
+    })
+
+
+def make_daily_data(year, seed=0) -> pd.DataFrame:
+    """Создает ежедневные отметки в формате data_YYYY.csv"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(pd.Timestamp(year, 1, 1), pd.Timestamp(year, 12, 31), freq='D')
+    return pd.DataFrame({
+        'Date': dates.strftime('%d.%m.%y'),
+        'Do': rng.integers(0, 4, len(dates)),
+        'Do2': rng.integers(0, 5, len(dates)),
+        'Mood': rng.integers(0, 5, len(dates)),
+    })
+
+
+def make_mood_log(year, entries_per_day=2, seed=0) -> pd.DataFrame:
+    """Создает экспорт Daylio в формате mood_YYYY.csv (новые записи сверху)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(pd.Timestamp(year, 1, 1), pd.Timestamp(year, 12, 31), freq='D')
+    dates = dates.repeat(entries_per_day)
+    df = pd.DataFrame({
+        'full_date': dates.strftime('%Y-%m-%d'),
+        'date': dates.strftime('%B %d'),
+        'weekday': dates.strftime('%A'),
+        'time': '12:00',
+        'mood': rng.choice(['awful', 'bad', 'meh', 'good', 'great'], len(dates), p=[.05, .15, .3, .3, .2]),
+        'activities': 'work | reading',
+        'note': '',
+    })
+    return df.iloc[::-1]
+
+
+def make_statistics_folder(folder: str, years, rows_per_year=5000):
+    """Создает папку "Статистика" со всеми файлами за каждый год"""
+    for year in years:
+        year_folder = os.path.join(folder, str(year))
+        os.makedirs(year_folder, exist_ok=True)
+        make_mood_log(year, seed=year).to_csv(os.path.join(year_folder, f'mood_{year}.csv'), index=False)
+        make_time_log([year], rows_per_year, seed=year).to_csv(os.path.join(year_folder, f'time_{year}.csv'))
+        make_daily_data(year, seed=year).to_csv(os.path.join(year_folder, f'data_{year}.csv'), index=False)
+    use_static(folder)
+
+
+def write_static(folder: str):
+    """Создает static/activities.csv и static/groups.csv"""
+    static = os.path.join(folder, 'static')
+    os.makedirs(static, exist_ok=True)
+    palette = ['tab:blue', 'tab:orange', 'tab:green', 'tab:red', 'tab:purple',
+               'tab:brown', 'tab:pink', 'tab:gray', 'tab:olive', 'tab:cyan']
+    rows = []
+    for i, activity in enumerate(ACTIVITIES):
+        group = activity.split(':')[0] if ':' in activity else ''
+        rows.append({'Activity': activity.split(':')[-1], 'Color': palette[i % len(palette)], 'Group': group})
+    pd.DataFrame(rows).to_csv(os.path.join(static, 'activities.csv'), index=False)
+    pd.DataFrame([{'Group': g, 'Color': c} for g, c in GROUPS.items()]).to_csv(
+        os.path.join(static, 'groups.csv'), index=False)
+    return os.path.join(static, 'activities.csv'), os.path.join(static, 'groups.csv')
+
+
+def use_static(folder: str):
+    """Направляет ActivityInfo на синтетические файлы цветов"""
+    import modules.ActivityInfo as activity_info
+    activity_info.ACTIVITIES_FILE, activity_info.GROUPS_FILE = write_static(folder)
+
+
+def timeit(func, repeat=3):
+    """Возвращает лучшее время выполнения func в секундах"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
@@ -1,7 +1,40 @@
+import os
+
 # Путь к папке "Статистика" с данными
 STATISTICS_FOLDER = r"D:\OneDrive\LIFE\Statistics"
 
+# Локальная папка для кэшей (графики, очищенные данные, манифест data2): все это восстанавливается
+# из файлов статистики, поэтому не должно лежать в синхронизируемой папке
+CACHE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
 # Путь к файлу с цветами для активностей
 COLOR_FILE = r"D:\OneDrive\LIFE\Statistics\static\colors.csv"
 ACTIVITIES_FILE = r"D:\OneDrive\LIFE\Statistics\static\activities.csv"
 GROUPS_FILE = r"D:\OneDrive\LIFE\Statistics\static\groups.csv"
+
+# Число параллельно загружаемых наборов данных при старте (1 — последовательно)
+LOAD_WORKERS = 4
+
+# Загружать наборы данных при первом обращении, а не при старте приложения
+LAZY_LOADING = True
+
+# Сколько отрисованных графиков держать в памяти
+CHART_CACHE_SIZE = 128
+
+# Сохранять отрисованные графики на диск (в папку charts внутри CACHE_FOLDER)
+CHART_DISK_CACHE = True
+
+# Сколько графиков хранить на диске; давно не использованные удаляются
+CHART_DISK_CACHE_ITEMS = 512
+
+# Число процессов для параллельной отрисовки графиков (0 — рисовать в потоке запроса)
+CHART_RENDER_WORKERS = 4
+
+# Сколько секунд запрос ждет график из пула отрисовки, прежде чем ответить ошибкой
+CHART_RENDER_TIMEOUT = 120
+
+# Отрисовать графики всех лет в фоне сразу после запуска (начиная с последнего года)
+CHART_WARMUP = True
+
+# Как часто (в секундах) проверять, не изменились ли файлы статистики; 0 — не проверять
+RELOAD_INTERVAL = 5
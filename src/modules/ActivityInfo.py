@@ -1,51 +1,108 @@
 import pandas as pd
 import sys
 import os
+import threading
+import time
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from config import ACTIVITIES_FILE, GROUPS_FILE
 
+# Цвет для активностей, которых нет в ACTIVITIES_FILE
+UNKNOWN_COLOR = 'lightgray'
+
+
 class ActivityInfo:
-    def __init__(self):
-        self.adf = pd.read_csv(ACTIVITIES_FILE)
-        self.gdf = pd.read_csv(GROUPS_FILE)
-        self.activitiesHash = self.adf['Activity'].to_dict()
+    def __init__(self, activities_file: str = None, groups_file: str = None):
+        self.adf = pd.read_csv(activities_file or ACTIVITIES_FILE)
+        self.gdf = pd.read_csv(groups_file or GROUPS_FILE)
         self.parseHash = {}
+        self.colorsHash = self._build_colors()
 
-    def get_activity_color(self, activity_name: str, use_group_color: bool = False) -> str:
-        try:
-            activity = self._parse_activity(activity_name)
-            if activity not in self.activitiesHash:
-                return 'lightgray'
+    def _build_colors(self) -> dict:
+        """Строит таблицу: нормализованное название активности -> (цвет, цвет группы)"""
+        group_colors = dict(zip(self.gdf['Group'], self.gdf['Color']))
 
-            activity_row = self.adf[self.adf['Activity'] == activity].values[0]
+        colors = {}
+        for activity, color, group in zip(self.adf['Activity'], self.adf['Color'], self.adf['Group']):
+            group_color = color
+            if pd.notna(group) and group != "":
+                group_color = group_colors.get(group, color)
+            colors.setdefault(self._parse_activity(str(activity)), (color, group_color))
+        return colors
 
-            if not use_group_color or activity_row['Group'] == "":
-                return activity_row['Color']
+    def get_activity_color(self, activity_name: str, use_group_color: bool = False) -> str:
+        activity = self._parse_activity(str(activity_name))
+        colors = self.colorsHash.get(activity)
+        if colors is None:
+            # Запоминаем неизвестную активность, чтобы не искать ее повторно
+            colors = self.colorsHash[activity] = (UNKNOWN_COLOR, UNKNOWN_COLOR)
+        return colors[use_group_color]
 
-            group_row = self.gdf[self.gdf['Group'] == activity_row['Group']].values[0]
-            
-            return group_row['Color']
+    def get_colors(self, activities, use_group_color: bool = False) -> pd.Series:
+        """Цвета для набора активностей: поиск выполняется один раз на уникальное название"""
+        activities = pd.Series(activities)
+        lookup = {activity: self.get_activity_color(activity, use_group_color)
+                  for activity in activities.unique()}
+        return activities.map(lookup)
 
-        except Exception as e:
-            print(f"Error getting activity color for {activity_name}: {e}")
-            return 'lightgray'
-    
     def _parse_activity(self, activity_name: str) -> str:
         if activity_name in self.parseHash:
             return self.parseHash[activity_name]
 
-        activity_name = activity_name.replace("_", "").replace(" ", "").lower().strip()
+        activity = activity_name.replace("_", "").replace(" ", "").lower().strip()
 
-        if ':' not in activity_name:
-            self.parseHash[activity_name] = activity_name
-            return activity_name
+        if ':' in activity:
+            activity = activity.split(':')[-1].strip()
 
-        arr = activity_name.split(':')
-        activity = arr[-1].strip()
         self.parseHash[activity_name] = activity
-        return self.parseHash[activity_name]
+        return activity
+
+
+class ActivityInfoRegistry:
+    """
+    Общий для всего процесса ActivityInfo.
+    Файлы цветов и групп читаются один раз и перечитываются только при изменении их mtime.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._info = None
+        self._mtimes = None
+        self.loads = 0
+        self.checks = 0
+        self.check_seconds = 0.0
+        self.last_check_seconds = 0.0
+
+    def get(self) -> ActivityInfo:
+        """Возвращает актуальный ActivityInfo, перечитывая файлы только если они изменились"""
+        started = time.perf_counter()
+        files = (ACTIVITIES_FILE, GROUPS_FILE)
+        mtimes = tuple(os.stat(file).st_mtime_ns for file in files)
+        if mtimes != self._mtimes:
+            with self._lock:
+                if mtimes != self._mtimes:
+                    self._info = ActivityInfo(*files)
+                    self._mtimes = mtimes
+                    self.loads += 1
+        else:
+            elapsed = time.perf_counter() - started
+            self.checks += 1
+            self.check_seconds += elapsed
+            self.last_check_seconds = elapsed
+        return self._info
 
+    def version(self) -> str:
+        """Версия файлов цветов (по их mtime) для ключей кэшей, зависящих от цветов"""
+        self.get()
+        return '-'.join(str(mtime) for mtime in self._mtimes)
 
+    def stats(self) -> dict:
+        """Статистика реестра: число загрузок и стоимость проверки актуальности"""
+        return {
+            'loads': self.loads,
+            'checks': self.checks,
+            'last_check_us': round(self.last_check_seconds * 1e6, 1),
+            'avg_check_us': round(self.check_seconds / self.checks * 1e6, 1) if self.checks else 0.0,
+        }
 
 
+activity_registry = ActivityInfoRegistry()
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+# Версия отрисовки: увеличить при изменении графиков, чтобы не отдавать старые файлы с диска
+CHART_CACHE_VERSION = 2
+
+# Временные файлы старше этого (секунды) остались от прерванной записи
+STALE_TEMP_AGE = 3600
+
+
+class ChartCache:
+    """
+    Кэш отрисованных графиков (PNG): LRU в памяти и необязательный уровень на диске.
+    Ключ — (набор данных, год, график, параметры, версия данных), поэтому после
+    перезагрузки года старые записи больше не находятся; invalidate освобождает их сразу.
+    Файлы на диске, не найденные так (старые версии данных и цветов), вытесняются
+    по давности использования сверх max_disk_items (prune_disk).
+    """
+    def __init__(self, max_items: int = 128, disk_folder: Optional[str] = None, max_disk_items: int = 512):
+        self.max_items = max_items
+        self.disk_folder = disk_folder
+        self.max_disk_items = max_disk_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_items = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_folder is not None:
+            self.prune_disk()
+
+    @staticmethod
+    def make_key(kind: str, year: int, chart: str, params: Dict, version: str) -> Tuple:
+        return (kind, year, chart, tuple(sorted(params.items())), version, CHART_CACHE_VERSION)
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            png = self._items.get(key)
+            if png is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return png
+
+        path = self._disk_path(key)
+        if path is not None and os.path.exists(path):
+            with open(path, 'rb') as f:
+                png = f.read()
+            try:
+                os.utime(path)  # время использования для вытеснения старых файлов
+            except OSError:
+                pass
+            self._remember(key, png)
+            self.disk_hits += 1
+            return png
+        return None
+
+    def put(self, key: Tuple, png: bytes):
+        self._remember(key, png)
+        path = self._disk_path(key)
+        if path is not None:
+            os.makedirs(self.disk_folder, exist_ok=True)
+            # Свой временный файл на каждую запись: одновременные put одного ключа не мешают друг другу
+            fd, temp_path = tempfile.mkstemp(dir=self.disk_folder, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(png)
+            try:
+                os.replace(temp_path, path)
+            except OSError:
+                # Тот же график уже записал другой поток (в Windows замена занятого файла не удается)
+                os.remove(temp_path)
+            self._disk_items += 1
+            if self._disk_items > self.max_disk_items:
+                self.prune_disk()
+
+    def get_or_render(self, key: Tuple, render: Callable[[], bytes], store: bool = True) -> bytes:
+        """
+        Возвращает график из кэша или отрисовывает его через render() и запоминает.
+        store=False: render() сам кладет результат в кэш (например, пул отрисовки)
+        """
+        png = self.get(key)
+        if png is None:
+            self.misses += 1
+            png = render()
+            if store:
+                self.put(key, png)
+        return png
+
+    def invalidate(self, kind: str, year: int):
+        """Удаляет все графики набора данных за год из памяти и с диска"""
+        with self._lock:
+            for key in [key for key in self._items if key[:2] == (kind, year)]:
+                del self._items[key]
+        if self.disk_folder is not None and os.path.isdir(self.disk_folder):
+            prefix = f"{kind}_{year}_"
+            for name in os.listdir(self.disk_folder):
+                if name.startswith(prefix):
+                    try:
+                        os.remove(os.path.join(self.disk_folder, name))
+                    except FileNotFoundError:
+                        pass
+
+    def prune_disk(self) -> int:
+        """
+        Удаляет с диска графики прежних версий отрисовки, брошенные временные файлы и самые
+        давно использованные графики сверх max_disk_items. Возвращает число удаленных файлов.
+        """
+        if self.disk_folder is None or not os.path.isdir(self.disk_folder):
+            return 0
+        now = time.time()
+        version_tag = f"_v{CHART_CACHE_VERSION}_"
+        stale, charts = [], []
+        for entry in os.scandir(self.disk_folder):
+            try:
+                modified = entry.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if entry.name.endswith('.tmp'):
+                if now - modified > STALE_TEMP_AGE:
+                    stale.append(entry.path)
+            elif entry.name.endswith('.png'):
+                if version_tag in entry.name:
+                    charts.append((modified, entry.path))
+                else:
+                    stale.append(entry.path)
+        charts.sort(reverse=True)
+        stale += [path for _, path in charts[self.max_disk_items:]]
+        removed = 0
+        for path in stale:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        self._disk_items = min(len(charts), self.max_disk_items)
+        return removed
+
+    def stats(self) -> Dict:
+        return {
+            'items': len(self._items),
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+        }
+
+    def _remember(self, key: Tuple, png: bytes):
+        with self._lock:
+            self._items[key] = png
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def _disk_path(self, key: Tuple) -> Optional[str]:
+        if self.disk_folder is None:
+            return None
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_folder, f"{key[0]}_{key[1]}_v{CHART_CACHE_VERSION}_{digest}.png")
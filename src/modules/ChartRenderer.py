@@ -0,0 +1,300 @@
+import io
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Tuple
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+# Графики дашбордов: набор данных -> {название графика: функция (данные, год) -> Figure}.
+# Для ежедневных данных название графика — это столбец DailyData.
+CHARTS = {
+    'mood': {
+        'plot': lambda data, year: data.gen_plot(year=year),
+        'trend_line': lambda data, year: data.gen_mood_trend_line(year=year),
+    },
+    'time': {
+        'daily': lambda data, year: data.plot_daily(),
+        'heatmap': lambda data, year: data.draw_plot("week", False),
+    },
+}
+
+
+# pyplot хранит текущую фигуру глобально (plt.title, plt.legend, plt.tight_layout):
+# графики в одном процессе рисуются по очереди, иначе потоки портят чужие фигуры
+_pyplot_lock = threading.Lock()
+
+
+def figure_to_png(fig) -> bytes:
+    """Сохраняет фигуру matplotlib в PNG и закрывает ее"""
+    img = io.BytesIO()
+    fig.savefig(img, format='png', bbox_inches='tight')
+    plt.close(fig)
+    return img.getvalue()
+
+
+def chart_names(data_manager, kind: str, year: int):
+    """Названия графиков набора данных за год в порядке отображения"""
+    if kind == 'daily':
+        return list(data_manager.get_daily_data(year).df.columns)
+    return list(CHARTS[kind])
+
+
+def render_chart(data_manager, kind: str, year: int, chart: str) -> bytes:
+    """Отрисовывает график chart набора данных kind за год и возвращает PNG"""
+    data = getattr(data_manager, f"get_{kind}_data")(year)
+    if data is None:
+        raise KeyError(f"Нет данных {kind} за {year} год")
+    if kind == 'daily' and chart not in data.df.columns:
+        raise KeyError(f"Нет столбца {chart} в ежедневных данных за {year} год")
+    with _pyplot_lock:
+        if kind == 'daily':
+            fig = data.plot(chart)
+        else:
+            fig = CHARTS[kind][chart](data, year)
+        return figure_to_png(fig)
+
+
+def default_charts(data_manager) -> List[Tuple[str, int, str]]:
+    """
+    Все графики дашбордов в порядке прогрева: сначала последний год, внутри года —
+    время, настроение и ежедневные данные
+    """
+    charts = []
+    for year in sorted(set(data_manager.get_years('time')) | set(data_manager.get_years('mood'))
+                       | set(data_manager.get_years('daily')), reverse=True):
+        for kind in ('time', 'mood', 'daily'):
+            if year not in data_manager.get_years(kind):
+                continue
+            try:
+                charts.extend((kind, year, chart) for chart in chart_names(data_manager, kind, year))
+            except Exception as e:
+                print(f"Не удалось получить список графиков {kind} за {year} год: {str(e)}")
+    return charts
+
+
+class ChartWarmer:
+    """
+    Фоновый прогрев кэша графиков после запуска приложения. Рисует графики по одному
+    в отдельном потоке, поэтому сервер продолжает отвечать на запросы.
+    """
+    def __init__(self, get_charts: Callable[[], List[Tuple]], render: Callable[[str, int, str], bytes],
+                 prefetch: Optional[Callable[[List[Tuple]], None]] = None):
+        self.get_charts = get_charts
+        self.render = render
+        # Если задан, все графики сразу ставятся в фоновую очередь пула, а поток лишь дожидается их по порядку
+        self.prefetch = prefetch
+        self.state = 'idle'
+        self.total = 0
+        self.done = 0
+        self.errors = 0
+        self.current = None
+        self._started = None
+        self._finished = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.state = 'running'
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='chart-warmup', daemon=True)
+        self._thread.start()
+
+    def status(self) -> Dict:
+        elapsed = None
+        if self._started is not None:
+            elapsed = round((self._finished or time.perf_counter()) - self._started, 2)
+        return {
+            'state': self.state,
+            'total': self.total,
+            'done': self.done,
+            'errors': self.errors,
+            'current': list(self.current) if self.current else None,
+            'seconds': elapsed,
+        }
+
+    def _run(self):
+        try:
+            charts = self.get_charts()
+            self.total = len(charts)
+            if self.prefetch is not None:
+                self.prefetch(charts)
+            for chart in charts:
+                self.current = chart
+                try:
+                    self.render(*chart)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Ошибка прогрева графика {chart[0]}/{chart[2]} за {chart[1]} год: {str(e)}")
+                self.done += 1
+            self.state = 'done'
+            print(f"Прогрев графиков завершен: {self.done} за {time.perf_counter() - self._started:.1f} с")
+        except Exception as e:
+            self.state = 'failed'
+            print(f"Ошибка прогрева графиков: {str(e)}")
+        finally:
+            self.current = None
+            self._finished = time.perf_counter()
+
+
+# DataManager процесса пула отрисовки (создается в _init_worker)
+_worker_manager = None
+
+
+def _init_worker(statistics_folder: str, cache_folder: Optional[str] = None):
+    """Инициализация процесса пула: свой DataManager в ленивом режиме (данные берутся из FrameCache)"""
+    global _worker_manager
+    from modules.DataManager import DataManager
+    _worker_manager = DataManager(statistics_folder, lazy=True, cache_folder=cache_folder)
+
+
+def _render_in_worker(kind: str, year: int, chart: str) -> bytes:
+    # Файлы могли измениться после запуска процесса; data2 обновляет основной процесс
+    _worker_manager.refresh_changed(regenerate_data2=False)
+    return render_chart(_worker_manager, kind, year, chart)
+
+
+class ChartRenderPool:
+    """
+    Пул процессов для отрисовки графиков. matplotlib под Agg загружает процессор и хранит
+    глобальное состояние pyplot, поэтому графики рисуются в отдельных процессах,
+    а несколько графиков страницы — одновременно.
+    Фоновые задачи (прогрев) ждут в своей очереди и занимают не больше background_slots
+    процессов, поэтому графики открытой страницы не стоят за всем прогревом.
+    on_result(ключ, PNG) вызывается один раз на каждую успешно завершенную задачу.
+    Если процесс пула погиб (нехватка памяти, падение), пул пересоздается при следующей задаче.
+    """
+    def __init__(self, statistics_folder: str, max_workers: Optional[int] = None,
+                 on_result: Optional[Callable[[Tuple, bytes], None]] = None,
+                 background_slots: Optional[int] = None, cache_folder: Optional[str] = None):
+        self.statistics_folder = statistics_folder
+        self.cache_folder = cache_folder
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = self._new_executor()
+        self.on_result = on_result
+        # По умолчанию один процесс всегда остается свободным для запросов страниц
+        self.background_slots = background_slots or max(1, self.max_workers - 1)
+        self._pending = {}
+        self._queued = OrderedDict()
+        self._background_running = 0
+        self._lock = threading.RLock()
+
+    def submit(self, key, kind: str, year: int, chart: str, background: bool = False) -> Future:
+        """
+        Ставит отрисовку графика в очередь и возвращает Future с PNG.
+        Пока задача с тем же ключом не завершена, возвращается она же, а не новая;
+        обычный запрос графика, ждущего в фоновой очереди, запускает его сразу.
+        """
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = Future()
+                self._pending[key] = future
+                future.add_done_callback(lambda done: self._finish(key, done))
+                if background:
+                    self._queued[key] = (kind, year, chart)
+                else:
+                    self._start(future, kind, year, chart)
+            elif not background and key in self._queued:
+                self._start(future, *self._queued.pop(key))
+            self._start_background()
+            return future
+
+    def render_many(self, jobs: List[Tuple]) -> Dict:
+        """Отрисовывает задачи (ключ, набор, год, график) одновременно; возвращает {ключ: PNG или исключение}"""
+        futures = {key: self.submit(key, kind, year, chart) for key, kind, year, chart in jobs}
+        results = {}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                results[key] = e
+        return results
+
+    def shutdown(self):
+        with self._lock:
+            queued = [self._pending[key] for key in self._queued]
+            self._queued.clear()
+        for future in queued:
+            future.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn, а не fork: основной процесс многопоточный (Flask, прогрев), fork копирует чужие блокировки
+        return ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                   initargs=(self.statistics_folder, self.cache_folder),
+                                   mp_context=multiprocessing.get_context('spawn'))
+
+    def _start(self, future: Future, kind: str, year: int, chart: str, background: bool = False,
+               retry: bool = True):
+        """
+        Отправляет задачу в процессы; если отправить не удалось, future завершается с ошибкой.
+        retry: задача, попавшая в сломанный пул, один раз повторяется в новом
+        """
+        try:
+            try:
+                executor = self.executor
+                task = executor.submit(_render_in_worker, kind, year, chart)
+            except BrokenProcessPool:
+                executor = self._replace_executor(executor)
+                task = executor.submit(_render_in_worker, kind, year, chart)
+        except Exception as e:
+            # Ошибка завершает future и убирает его из _pending (см. _finish), ожидающие не зависают
+            future.set_exception(e)
+            return
+        if background:
+            self._background_running += 1
+        job = (kind, year, chart, background, retry)
+        task.add_done_callback(lambda done: self._task_done(future, done, executor, job))
+
+    def _replace_executor(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        """Заменяет сломанный пул (процесс завершился аварийно) новым, если этого еще не сделали"""
+        with self._lock:
+            if self.executor is broken:
+                print("Пул отрисовки сломан (процесс завершился аварийно), создаем новый")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self.executor = self._new_executor()
+            return self.executor
+
+    def _start_background(self):
+        while self._queued and self._background_running < self.background_slots:
+            key, (kind, year, chart) = self._queued.popitem(last=False)
+            self._start(self._pending[key], kind, year, chart, background=True)
+
+    def _task_done(self, future: Future, task: Future, executor: ProcessPoolExecutor, job: Tuple):
+        kind, year, chart, background, retry = job
+        if background:
+            with self._lock:
+                self._background_running -= 1
+        if retry and not task.cancelled() and isinstance(task.exception(), BrokenProcessPool):
+            # Задачу мог погубить чужой упавший процесс: повторяем один раз в новом пуле
+            self._replace_executor(executor)
+            with self._lock:
+                self._start(future, kind, year, chart, background, retry=False)
+                self._start_background()
+            return
+        # Сначала завершаем свою задачу, затем запускаем следующую фоновую
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+        if background:
+            with self._lock:
+                self._start_background()
+
+    def _finish(self, key, future: Future):
+        with self._lock:
+            self._pending.pop(key, None)
+        if self.on_result is not None and not future.cancelled() and future.exception() is None:
+            try:
+                self.on_result(key, future.result())
+            except Exception as e:
+                print(f"Не удалось сохранить график {key[:3]}: {str(e)}")
@@ -1,28 +1,138 @@
+import csv
+import io
 import os
+import threading
+import time
 import pandas as pd
-from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
 import sys
 
 # Добавляем путь к родительской директории для импорта модулей
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from modules.mood.DaylioJournal import DaylioJournal
-from modules.timedata.TimeData import TimeData
+from modules.timedata.TimeData import TimeData, TIME_FORMAT, read_time_csv
 from modules.dailydata.DailyData import DailyData
+from modules.SourceManifest import SourceManifest, sources_version
+from modules.FrameCache import FrameCache
+
+# Наборы данных за год: название -> (что загружено, чего не удалось загрузить)
+DATASETS = {
+    'mood': ('данные настроения', 'данных настроения'),
+    'time': ('данные времени', 'данных времени'),
+    'daily': ('ежедневные данные', 'ежедневных данных'),
+}
+
+
+def dataset_sources(kind: str, year: int, year_folder: str) -> List[str]:
+    """Существующие файлы-источники набора данных kind за год"""
+    if kind == 'mood':
+        files = [f"mood_{year}.csv"]
+    elif kind == 'time':
+        files = [f"time_{year}.csv"]
+    elif kind == 'daily':
+        # Ежедневные данные объединяются из data_YYYY.csv и data2_YYYY.csv
+        files = [f"data_{year}.csv", f"data2_{year}.csv"]
+    else:
+        raise ValueError(f"Неизвестный набор данных: {kind}")
+    paths = [os.path.join(year_folder, file) for file in files]
+    return [path for path in paths if os.path.exists(path)]
+
+
+def read_dataset_frame(kind: str, sources: List[str]) -> pd.DataFrame:
+    """Читает и очищает набор данных из csv в DataFrame, пригодный для FrameCache"""
+    if kind == 'mood':
+        data = DaylioJournal(sources[0]).data
+        data['mood'] = data['mood'].astype('category')
+        return data
+    if kind == 'time':
+        return read_time_csv(sources[0])
+    # Файлы объединяются по столбцу Date в памяти, без временного файла
+    return DailyData(sources).df
+
+
+def load_dataset(kind: str, year: int, year_folder: str, cache_folder: Optional[str] = None):
+    """
+    Загружает набор данных kind за год; возвращает (данные, версия файлов) или (None, None), если файлов нет.
+    Версия берется до чтения: если файл перезапишут во время загрузки, следующая проверка это заметит.
+    cache_folder: папка FrameCache — очищенные данные берутся оттуда, если исходники не менялись
+    """
+    sources = dataset_sources(kind, year, year_folder)
+    if not sources:
+        return None, None
+    version = sources_version(sources)
+
+    if cache_folder is not None:
+        frame = FrameCache(cache_folder).load(f"{kind}_{year}", sources,
+                                              lambda: read_dataset_frame(kind, sources))
+    else:
+        frame = read_dataset_frame(kind, sources)
+
+    if kind == 'mood':
+        return DaylioJournal.from_clean_data(frame), version
+    if kind == 'time':
+        return TimeData(frame), version
+    return DailyData(frame), version
+
+
+def count_csv_rows(path: str) -> int:
+    """Число записей в csv без разбора значений (учитывает переносы строк внутри кавычек)"""
+    with open(path, newline='', encoding='utf-8', errors='replace') as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+
+def _timed_load(kind: str, year: int, year_folder: str, cache_folder: Optional[str] = None):
+    """Загружает набор данных и возвращает (данные, версия, секунды, ошибка); не бросает исключений"""
+    started = time.perf_counter()
+    try:
+        (data, version), error = load_dataset(kind, year, year_folder, cache_folder), None
+    except Exception as e:
+        data, version, error = None, None, str(e)
+    return data, version, time.perf_counter() - started, error
+
 
 class DataManager:
-    def __init__(self, statistics_folder: str):
+    def __init__(self, statistics_folder: str, max_workers: int = 1, use_processes: bool = False,
+                 lazy: bool = False, use_cache: bool = True, cache_folder: Optional[str] = None):
         """
         Инициализация менеджера данных
         
         Args:
             statistics_folder: Путь к папке "Статистика"
+            max_workers: Число параллельно загружаемых наборов данных (1 — последовательно)
+            use_processes: Загружать в пуле процессов вместо пула потоков
+            lazy: Не загружать данные при старте, а строить каждый набор при первом обращении
+            use_cache: Хранить очищенные данные в Feather-кэше и загружать их оттуда, если csv не менялись
+            cache_folder: Папка служебных файлов (манифесты, кэши); по умолчанию — скрытая папка .cache
+                внутри папки статистики. Для синхронизируемой папки статистики лучше указать локальную.
         """
         self.statistics_folder = statistics_folder
+        self.cache_folder = cache_folder or os.path.join(statistics_folder, '.cache')
+        self.frame_cache_folder = os.path.join(self.cache_folder, 'frames') if use_cache else None
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self.lazy = lazy
         self.mood_data = {}
         self.time_data = {}
         self.daily_data = {}
         self.available_years = []
+        self.load_report = []
+        # Найденные файлы-источники: набор данных -> {год: [пути]}
+        self.sources = {kind: {} for kind in DATASETS}
+        # Наборы, которые не удалось загрузить: (набор, год) -> версия файлов на момент ошибки
+        self._failed = {}
+        self._reload_failed = {}
+        self._load_locks = {}
+        self._row_counts = {}
+        # Версии загруженных наборов данных: (набор, год) -> версия исходных файлов
+        self.versions = {}
+        self._reload_listeners = []
+        # Версии time_YYYY.csv, по которым последний раз проверялся data2_YYYY.csv
+        self._data2_checked = {}
+        self._refresh_lock = threading.Lock()
+        self._last_refresh = time.monotonic()
         
         # Загружаем все доступные данные
         self.load_all_data()
@@ -33,7 +143,19 @@ class DataManager:
             print(f"Папка {self.statistics_folder} не найдена!")
             return
         
-        # Получаем список папок с годами
+        self._scan_years()
+
+        if self.lazy:
+            print("Ленивый режим: данные будут загружены при первом обращении")
+            return
+        
+        # Загружаем все пары (год, набор данных), при max_workers > 1 — параллельно
+        jobs = [(year, kind) for year in self.available_years for kind in DATASETS
+                if year in self.sources[kind]]
+        self.load_report = self._load_jobs(jobs)
+
+    def _scan_years(self):
+        """Находит папки с годами и файлы-источники в них"""
         year_folders = []
         for item in os.listdir(self.statistics_folder):
             item_path = os.path.join(self.statistics_folder, item)
@@ -41,66 +163,195 @@ class DataManager:
                 year_folders.append(int(item))
         
         self.available_years = sorted(year_folders)
-        
-        # Загружаем данные для каждого года
+
         for year in self.available_years:
-            year_folder = os.path.join(self.statistics_folder, str(year))
-            self.load_year_data(year, year_folder)
+            self._scan_year(year)
+        for kind in DATASETS:
+            for year in set(self.sources[kind]) - set(self.available_years):
+                del self.sources[kind][year]
+
+    def _scan_year(self, year: int):
+        """Запоминает, какие файлы-источники есть за год"""
+        year_folder = os.path.join(self.statistics_folder, str(year))
+        for kind in DATASETS:
+            sources = dataset_sources(kind, year, year_folder)
+            if sources:
+                self.sources[kind][year] = sources
+            else:
+                self.sources[kind].pop(year, None)
     
     def load_year_data(self, year: int, year_folder: str):
         """Загружает данные для конкретного года"""
-        # Загружаем данные настроения
-        mood_file = os.path.join(year_folder, f"mood_{year}.csv")
-        if os.path.exists(mood_file):
-            try:
-                self.mood_data[year] = DaylioJournal(mood_file)
-                print(f"Загружены данные настроения за {year} год")
-            except Exception as e:
-                print(f"Ошибка загрузки данных настроения за {year} год: {e}")
-        
-        # Загружаем данные времени (используем общий файл с цветами)
-        time_file = os.path.join(year_folder, f"time_{year}.csv")
-        
-        if os.path.exists(time_file):
-            try:
-                self.time_data[year] = TimeData(time_file)
-                print(f"Загружены данные времени за {year} год")
-            except Exception as e:
-                print(f"Ошибка загрузки данных времени за {year} год: {e}")
-        
-        # Загружаем ежедневные данные (объединяем data_YYYY.csv и data2_YYYY.csv)
-        daily_file = os.path.join(year_folder, f"data_{year}.csv")
-        data2_file = os.path.join(year_folder, f"data2_{year}.csv")
-        
-        if os.path.exists(daily_file) or os.path.exists(data2_file):
-            try:
-                # Создаем объединенный файл или используем существующий
-                merged_file = self._merge_daily_data_files(daily_file, data2_file, year)
-                self.daily_data[year] = DailyData(merged_file)
-                print(f"Загружены ежедневные данные за {year} год (объединены data и data2)")
-            except Exception as e:
-                print(f"Ошибка загрузки ежедневных данных за {year} год: {e}")
+        self.load_report += self._load_jobs([(year, kind) for kind in DATASETS], year_folder)
+
+    def _load_jobs(self, jobs: List, year_folder: Optional[str] = None) -> List[Dict]:
+        """
+        Загружает наборы данных для пар (год, набор) и раскладывает их по словарям.
+        Результаты применяются в порядке jobs, поэтому не зависят от порядка завершения;
+        ошибка одного набора не мешает остальным. Возвращает отчет о времени загрузки.
+        """
+        def folder(year):
+            return year_folder or os.path.join(self.statistics_folder, str(year))
+
+        if self.max_workers > 1 and len(jobs) > 1:
+            executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            with executor_class(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(_timed_load, kind, year, folder(year), self.frame_cache_folder)
+                           for year, kind in jobs]
+                results = [future.result() for future in futures]
+        else:
+            results = [_timed_load(kind, year, folder(year), self.frame_cache_folder) for year, kind in jobs]
+
+        report = []
+        for (year, kind), (data, version, seconds, error) in zip(jobs, results):
+            loaded_name, failed_name = DATASETS[kind]
+            if error is not None:
+                print(f"Ошибка загрузки {failed_name} за {year} год: {error}")
+            elif data is not None:
+                getattr(self, f"{kind}_data")[year] = data
+                self._set_version(kind, year, version)
+                print(f"Загружены {loaded_name} за {year} год ({seconds:.2f} с)")
+            else:
+                continue
+            report.append({'year': year, 'dataset': kind, 'seconds': round(seconds, 3), 'error': error})
+        return report
+
+    def _set_version(self, kind: str, year: int, version: str):
+        """
+        Запоминает версию загруженного набора (взятую до чтения файлов) и, если он был
+        перезагружен, оповещает подписчиков
+        """
+        previous = self.versions.get((kind, year))
+        self.versions[(kind, year)] = version
+        if previous is not None and previous != self.versions[(kind, year)]:
+            for listener in self._reload_listeners:
+                listener(kind, year)
+
+    def add_reload_listener(self, listener):
+        """Подписывает listener(kind, year) на перезагрузку набора данных (например, для сброса кэшей)"""
+        self._reload_listeners.append(listener)
+
+    def get_version(self, kind: str, year: int) -> Optional[str]:
+        """Версия набора данных за год; меняется при изменении его исходных файлов"""
+        if (kind, year) in self.versions:
+            return self.versions[(kind, year)]
+        sources = self.sources[kind].get(year)
+        return sources_version(sources) if sources else None
+
+    def get_last_modified(self, kind: str, year: int) -> Optional[datetime]:
+        """Время последнего изменения исходных файлов набора данных за год"""
+        sources = self.sources[kind].get(year)
+        if not sources:
+            return None
+        return datetime.fromtimestamp(max(os.path.getmtime(path) for path in sources), tz=timezone.utc)
+
+    def refresh_changed(self, min_interval: float = 0, regenerate_data2: bool = True) -> List[Tuple[str, int]]:
+        """
+        Перезагружает только те наборы данных, у которых изменились файлы-источники (mtime или размер).
+        Новый объект подменяет старый целиком, поэтому запрос видит либо старые, либо новые данные;
+        версия набора меняется, и подписчики (кэши графиков) сбрасывают его записи.
+
+        Args:
+            min_interval: Не проверять файлы чаще, чем раз в столько секунд
+            regenerate_data2: Обновить data2_YYYY.csv для изменившихся time_YYYY.csv
+
+        Returns:
+            Список перезагруженных пар (набор, год)
+        """
+        if time.monotonic() - self._last_refresh < min_interval or not os.path.exists(self.statistics_folder):
+            return []
+        # Проверку уже выполняет другой поток
+        if not self._refresh_lock.acquire(blocking=False):
+            return []
+        try:
+            self._last_refresh = time.monotonic()
+            return self._refresh_changed(regenerate_data2)
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh_changed(self, regenerate_data2: bool) -> List[Tuple[str, int]]:
+        self._scan_years()
+
+        if regenerate_data2:
+            changed_time = [year for year, sources in self.sources['time'].items()
+                            if sources_version(sources) != self._data2_checked.get(year)]
+            if changed_time:
+                self.generate_data2_files(years=changed_time)
+
+        reloaded = []
+        for kind in DATASETS:
+            loaded = getattr(self, f"{kind}_data")
+            for year in sorted(set(loaded) | set(self.sources[kind])):
+                key = (kind, year)
+                sources = self.sources[kind].get(year)
+                version = sources_version(sources) if sources else None
+                if version == self.versions.get(key) or (key in self._reload_failed and version == self._reload_failed[key]):
+                    continue
+                if self._failed.get(key, version) != version:
+                    del self._failed[key]
+
+                if version is None:
+                    # Файлы набора удалены
+                    loaded.pop(year, None)
+                    self.versions.pop(key, None)
+                    for listener in self._reload_listeners:
+                        listener(kind, year)
+                    print(f"Удалены {DATASETS[kind][0]} за {year} год")
+                    reloaded.append(key)
+                    continue
+
+                if year not in loaded and (self.lazy or key in self._failed):
+                    # В ленивом режиме набор загрузится при первом обращении
+                    continue
+
+                report = self._load_jobs([(year, kind)])
+                self.load_report += report
+                if not report or report[0]['error'] is not None:
+                    # Старый объект (если был) остается, пока файл не изменится снова
+                    if year in loaded:
+                        self._reload_failed[key] = version
+                    else:
+                        self._failed[key] = version
+                    continue
+                self._reload_failed.pop(key, None)
+                reloaded.append(key)
+        return reloaded
+
+    def _get_dataset(self, kind: str, year: Optional[int]):
+        """Возвращает набор данных за год (или последний доступный), в ленивом режиме загружая его"""
+        loaded = getattr(self, f"{kind}_data")
+        if year is None:
+            years = self.get_years(kind)
+            year = max(years) if years else None
+
+        if self.lazy and year not in loaded and year in self.sources[kind] and (kind, year) not in self._failed:
+            lock = self._load_locks.setdefault((kind, year), threading.Lock())
+            with lock:
+                if year not in loaded and (kind, year) not in self._failed:
+                    version = self.get_version(kind, year)
+                    self.load_report += self._load_jobs([(year, kind)])
+                    if year not in loaded:
+                        self._failed[(kind, year)] = version
+
+        return loaded.get(year)
+
+    def get_years(self, kind: str) -> List[int]:
+        """Годы, за которые есть набор данных kind (в ленивом режиме — по найденным файлам)"""
+        if self.lazy:
+            return sorted(year for year in self.sources[kind] if (kind, year) not in self._failed)
+        return sorted(getattr(self, f"{kind}_data").keys())
     
     def get_mood_data(self, year: Optional[int] = None) -> Optional[DaylioJournal]:
         """Получает данные настроения для указанного года или последнего доступного"""
-        if year is None:
-            year = max(self.mood_data.keys()) if self.mood_data else None
-        
-        return self.mood_data.get(year)
+        return self._get_dataset('mood', year)
     
     def get_time_data(self, year: Optional[int] = None) -> Optional[TimeData]:
         """Получает данные времени для указанного года или последнего доступного"""
-        if year is None:
-            year = max(self.time_data.keys()) if self.time_data else None
-        
-        return self.time_data.get(year)
+        return self._get_dataset('time', year)
     
     def get_daily_data(self, year: Optional[int] = None) -> Optional[DailyData]:
         """Получает ежедневные данные для указанного года или последнего доступного"""
-        if year is None:
-            year = max(self.daily_data.keys()) if self.daily_data else None
-        
-        return self.daily_data.get(year)
+        return self._get_dataset('daily', year)
     
     def get_available_years(self) -> List[int]:
         """Возвращает список доступных лет"""
@@ -108,56 +359,108 @@ class DataManager:
     
     def has_mood_data(self, year: Optional[int] = None) -> bool:
         """Проверяет наличие данных настроения"""
+        years = self.get_years('mood')
         if year is None:
-            return len(self.mood_data) > 0
-        return year in self.mood_data
+            return len(years) > 0
+        return year in years
     
     def has_time_data(self, year: Optional[int] = None) -> bool:
         """Проверяет наличие данных времени"""
+        years = self.get_years('time')
         if year is None:
-            return len(self.time_data) > 0
-        return year in self.time_data
+            return len(years) > 0
+        return year in years
     
     def has_daily_data(self, year: Optional[int] = None) -> bool:
         """Проверяет наличие ежедневных данных"""
+        years = self.get_years('daily')
         if year is None:
-            return len(self.daily_data) > 0
-        return year in self.daily_data
+            return len(years) > 0
+        return year in years
     
-    def generate_data2_files(self):
-        """Генерирует файлы data2_YYYY.csv на основе time_YYYY.csv если они не существуют"""
-        for year in self.available_years:
+    def generate_data2_files(self, force: bool = False, years: Optional[List[int]] = None):
+        """
+        Генерирует файлы data2_YYYY.csv на основе time_YYYY.csv.
+        Перегенерируются только года, у которых изменился time_YYYY.csv (по манифесту отпечатков);
+        если time_YYYY.csv был только дописан, data2 дополняется по новым строкам.
+        force: перегенерировать все года
+        years: проверить только эти года (по умолчанию — все доступные)
+        """
+        if not self.available_years:
+            return
+
+        manifest = SourceManifest(os.path.join(self.cache_folder, 'data2_manifest.json'))
+        for year in (self.available_years if years is None else years):
             year_folder = os.path.join(self.statistics_folder, str(year))
             time_file = os.path.join(year_folder, f"time_{year}.csv")
             data2_file = os.path.join(year_folder, f"data2_{year}.csv")
-            
-            # Проверяем, существует ли уже файл data2
-            # if os.path.exists(data2_file):
-            #     print(f"Файл data2_{year}.csv уже существует, пропускаем")
-            #     continue
-            
+            time_key, data2_key = f"time_{year}", f"data2_{year}"
+
             # Проверяем, существует ли файл time
             if not os.path.exists(time_file):
                 print(f"Файл time_{year}.csv не найден, пропускаем генерацию data2_{year}.csv")
                 continue
-            
+
+            self._data2_checked[year] = sources_version([time_file])
             try:
-                self._generate_data2_file(time_file, data2_file, year)
-                print(f"Сгенерирован файл data2_{year}.csv")
+                # data2 можно переиспользовать, только если его никто не менял после нас
+                data2_valid = not force and manifest.is_unchanged(data2_key, data2_file)
+                if data2_valid and manifest.is_unchanged(time_key, time_file):
+                    print(f"Файл time_{year}.csv не изменился, data2_{year}.csv актуален")
+                    continue
+
+                appended_from = manifest.appended_since(time_key, time_file) if data2_valid else None
+                if appended_from is not None:
+                    self._append_data2_file(time_file, data2_file, year, appended_from)
+                    print(f"Дополнен файл data2_{year}.csv новыми записями")
+                else:
+                    self._generate_data2_file(time_file, data2_file, year)
+                    print(f"Сгенерирован файл data2_{year}.csv")
+
+                manifest.update(time_key, time_file)
+                manifest.update(data2_key, data2_file)
+                self._scan_year(year)
             except Exception as e:
                 print(f"Ошибка при генерации data2_{year}.csv: {e}")
-    
+        manifest.save()
+
     def _generate_data2_file(self, time_file: str, data2_file: str, year: int):
         """Генерирует файл data2_YYYY.csv на основе time_YYYY.csv"""
         # Читаем данные времени
         time_df = pd.read_csv(time_file)
-        
-        # Конвертируем Start в datetime
-        time_df['Start'] = pd.to_datetime(time_df['Start'])
-        
+        data2_df = self._build_data2_frame(time_df, year)
+
+        # Сохраняем файл
+        data2_df.to_csv(data2_file, index=False)
+
+    def _append_data2_file(self, time_file: str, data2_file: str, year: int, offset: int):
+        """
+        Дополняет data2_YYYY.csv по строкам, дописанным в time_YYYY.csv начиная с байта offset.
+        Результат совпадает с полной перегенерацией: новые активности добавляются столбцами в конец.
+        """
+        with open(time_file, 'rb') as f:
+            header = f.readline()
+            f.seek(offset)
+            tail = f.read()
+        new_df = self._build_data2_frame(pd.read_csv(io.BytesIO(header + tail)), year)
+        data2_df = pd.read_csv(data2_file)
+
+        for activity in new_df.columns[1:]:
+            if activity in data2_df.columns:
+                data2_df[activity] = data2_df[activity] | new_df[activity]
+            else:
+                data2_df[activity] = new_df[activity]
+
+        data2_df.to_csv(data2_file, index=False)
+
+    def _build_data2_frame(self, time_df: pd.DataFrame, year: int) -> pd.DataFrame:
+        """
+        Строит таблицу data2: по строке на каждый день года и по столбцу на каждую активность,
+        1 — активность была в этот день, 0 — не было. Матрица считается одним crosstab.
+        """
         # Извлекаем дату из Start
-        time_df['Date'] = time_df['Start'].dt.date
-        
+        time_df['Date'] = pd.to_datetime(time_df['Start'], format=TIME_FORMAT).dt.normalize()
+
         # Нормализуем активности: все, что начинается с "Work", объединяем в одну активность "Work"
         time_df['Activity'] = time_df['Activity'].astype(str)
         work_mask = time_df['Activity'].str.match(r'^Work')
@@ -165,85 +468,51 @@ class DataManager:
 
         # Получаем все уникальные активности
         all_activities = time_df['Activity'].unique()
-        
+
         # Создаем полный диапазон дат за год
-        start_date = pd.Timestamp(year, 1, 1)
-        end_date = pd.Timestamp(year, 12, 31)
-        all_dates = pd.date_range(start=start_date, end=end_date, freq='D')
-        
-        # Создаем DataFrame с датами
+        all_dates = pd.date_range(start=pd.Timestamp(year, 1, 1), end=pd.Timestamp(year, 12, 31), freq='D')
+
+        # Матрица присутствия день x активность
+        presence = pd.crosstab(time_df['Date'], time_df['Activity'])
+        presence = presence.reindex(index=all_dates, columns=all_activities, fill_value=0)
+        presence = (presence > 0).astype(int).reset_index(drop=True)
+        presence.columns = list(all_activities)
+
         data2_df = pd.DataFrame({
             'Date': all_dates.strftime('%d.%m.%y')
         })
-        
-        # Для каждой активности создаем столбец
-        for activity in all_activities:
-            activity_values = []
-            for date in all_dates:
-                date_obj = date.date()
-                # Получаем все записи для этой даты
-                day_records = time_df[time_df['Date'] == date_obj]
-                
-                # Проверяем, была ли эта активность в этот день
-                if len(day_records) > 0 and activity in day_records['Activity'].values:
-                    activity_values.append(1)
-                else:
-                    activity_values.append(0)
-            
-            # Добавляем столбец для этой активности
-            data2_df[activity] = activity_values
-        
-        # Сохраняем файл
-        data2_df.to_csv(data2_file, index=False)
-    
-    def _merge_daily_data_files(self, daily_file: str, data2_file: str, year: int) -> str:
-        """Объединяет файлы data_YYYY.csv и data2_YYYY.csv в один файл"""
-        # Создаем временный файл для объединенных данных
-        import tempfile
-        temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False)
-        temp_file.close()
-        
-        # Читаем данные из data_YYYY.csv если он существует
-        data_df = None
-        if os.path.exists(daily_file):
-            data_df = pd.read_csv(daily_file)
-            print(f"Загружен файл data_{year}.csv с {len(data_df)} строками")
-        
-        # Читаем данные из data2_YYYY.csv если он существует
-        data2_df = None
-        if os.path.exists(data2_file):
-            data2_df = pd.read_csv(data2_file)
-            print(f"Загружен файл data2_{year}.csv с {len(data2_df)} строками")
-        
-        # Объединяем данные
-        if data_df is not None and data2_df is not None:
-            # Оба файла существуют - объединяем по столбцу Date
-            merged_df = pd.merge(data_df, data2_df, on='Date', how='outer')
-            print(f"Объединены файлы data и data2, результат: {len(merged_df)} строк")
-        elif data_df is not None:
-            # Только data_YYYY.csv существует
-            merged_df = data_df
-            print(f"Используется только файл data_{year}.csv")
-        elif data2_df is not None:
-            # Только data2_YYYY.csv существует
-            merged_df = data2_df
-            print(f"Используется только файл data2_{year}.csv")
-        else:
-            # Ни один файл не существует
-            raise FileNotFoundError(f"Не найдены файлы data_{year}.csv и data2_{year}.csv")
-        
-        # Сохраняем объединенный файл
-        merged_df.to_csv(temp_file.name, index=False)
-        return temp_file.name
-    
+        return pd.concat([data2_df, presence], axis=1)
+
     def get_data_summary(self) -> Dict:
-        """Возвращает сводку по загруженным данным"""
+        """
+        Возвращает сводку по загруженным данным.
+        Для еще не загруженных наборов (ленивый режим) число записей берется из файлов без их разбора.
+        """
         return {
             'available_years': self.available_years,
-            'mood_years': list(self.mood_data.keys()),
-            'time_years': list(self.time_data.keys()),
-            'daily_years': list(self.daily_data.keys()),
-            'total_mood_records': sum(len(data.data) for data in self.mood_data.values()),
-            'total_time_records': sum(len(data.df) for data in self.time_data.values()),
-            'total_daily_records': sum(len(data.df) for data in self.daily_data.values())
+            'mood_years': self.get_years('mood'),
+            'time_years': self.get_years('time'),
+            'daily_years': self.get_years('daily'),
+            'total_mood_records': sum(self._count_records('mood', year) for year in self.get_years('mood')),
+            'total_time_records': sum(self._count_records('time', year) for year in self.get_years('time')),
+            'total_daily_records': sum(self._count_records('daily', year) for year in self.get_years('daily'))
         }
+
+    def _count_records(self, kind: str, year: int) -> int:
+        """Число записей набора данных: по загруженному объекту или по файлам-источникам"""
+        data = getattr(self, f"{kind}_data").get(year)
+        if data is not None:
+            return len(data.data) if kind == 'mood' else len(data.df)
+
+        sources = self.sources[kind].get(year, [])
+        key = (kind, tuple((path, os.path.getmtime(path)) for path in sources))
+        if key not in self._row_counts:
+            if kind == 'daily':
+                # Файлы объединяются по дате, поэтому считаем уникальные даты
+                dates = set()
+                for path in sources:
+                    dates.update(pd.read_csv(path, usecols=['Date'])['Date'])
+                self._row_counts[key] = len(dates)
+            else:
+                self._row_counts[key] = count_csv_rows(sources[0])
+        return self._row_counts[key]
@@ -0,0 +1,88 @@
+import json
+import os
+import pandas as pd
+from typing import Callable, Dict, List
+
+from modules.SourceManifest import file_fingerprint, fingerprint_matches
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+# Версия формата кэша: увеличить при изменении очистки данных, чтобы старые файлы не использовались
+FRAME_CACHE_VERSION = 1
+
+
+class FrameCache:
+    """
+    Кэш очищенных DataFrame в формате Feather (типы, категории и даты сохраняются как есть).
+    Запись кэша действительна, пока sha256 ее исходных csv не изменился.
+    Без pyarrow кэш отключается и данные всегда строятся из csv.
+    """
+    def __init__(self, folder: str):
+        self.folder = folder
+
+    @property
+    def enabled(self) -> bool:
+        return feather is not None
+
+    def load(self, name: str, sources: List[str], build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Возвращает DataFrame name из кэша, а если кэш устарел — строит его через build() и сохраняет"""
+        if not self.enabled:
+            return build()
+
+        data_path = os.path.join(self.folder, f"{name}.feather")
+        meta_path = os.path.join(self.folder, f"{name}.json")
+        meta = self._read_meta(meta_path)
+        if meta is not None and self._is_valid(meta, sources) and os.path.exists(data_path):
+            try:
+                df = feather.read_feather(data_path)
+                if meta['index'] is not None:
+                    df = df.set_index(meta['index'])
+                return df
+            except Exception as e:
+                print(f"Не удалось прочитать кэш {name}: {e}")
+
+        # Отпечатки до чтения: если csv перезапишут во время build(), запись кэша не будет действительной
+        fingerprints = {path: file_fingerprint(path) for path in sources}
+        df = build()
+        self._store(df, fingerprints, data_path, meta_path)
+        return df
+
+    def _is_valid(self, meta: dict, sources: List[str]) -> bool:
+        if meta.get('version') != FRAME_CACHE_VERSION or sorted(meta['sources']) != sorted(sources):
+            return False
+        return all(fingerprint_matches(meta['sources'][path], path) for path in sources)
+
+    def _store(self, df: pd.DataFrame, fingerprints: Dict[str, Dict], data_path: str, meta_path: str):
+        index = None
+        frame = df
+        if not isinstance(df.index, pd.RangeIndex):
+            index = df.index.name or 'index'
+            frame = df.reset_index(names=index)
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            # Сначала убираем метаданные, чтобы недописанный файл не считался действительным
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
+            feather.write_feather(frame, data_path)
+            meta = {
+                'version': FRAME_CACHE_VERSION,
+                'index': index,
+                'sources': fingerprints,
+            }
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2)
+        except Exception as e:
+            print(f"Не удалось сохранить кэш {os.path.basename(data_path)}: {e}")
+
+    @staticmethod
+    def _read_meta(meta_path: str):
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
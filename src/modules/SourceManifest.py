@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+# Размер блока при чтении файлов для хеширования
+CHUNK_SIZE = 1 << 20
+
+
+def file_hash(path: str, size: Optional[int] = None) -> str:
+    """sha256 содержимого файла или его первых size байт"""
+    digest = hashlib.sha256()
+    remaining = size
+    with open(path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            chunk = f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path: str) -> Dict:
+    """Отпечаток файла: mtime (нс), размер и sha256 содержимого"""
+    stat = os.stat(path)
+    return {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': file_hash(path)}
+
+
+def sources_version(paths: List[str]) -> str:
+    """
+    Короткая версия набора файлов по их путям, mtime и размерам (без чтения содержимого).
+    Не меняется между перезапусками, пока не меняются сами файлы.
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size};".encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+def fingerprint_matches(entry: Optional[Dict], path: str) -> bool:
+    """
+    Проверяет, совпадает ли файл с отпечатком entry. Хеш считается только при смене mtime;
+    если содержимое то же, в entry запоминается новый mtime.
+    """
+    if entry is None or not os.path.exists(path):
+        return False
+    stat = os.stat(path)
+    if stat.st_size != entry['size']:
+        return False
+    if stat.st_mtime_ns == entry['mtime']:
+        return True
+    if file_hash(path) != entry['sha256']:
+        return False
+    # Содержимое то же, файл только «потрогали» — запоминаем новый mtime
+    entry['mtime'] = stat.st_mtime_ns
+    return True
+
+
+class SourceManifest:
+    """
+    Манифест отпечатков исходных файлов, хранится в JSON.
+    Позволяет понять, изменился ли файл с прошлой обработки и не был ли он только дописан в конец.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Не удалось прочитать манифест {path}: {e}")
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.entries.get(key)
+
+    def is_unchanged(self, key: str, path: str) -> bool:
+        """Проверяет, совпадает ли файл с записанным отпечатком (хеш считается только при смене mtime)"""
+        return fingerprint_matches(self.entries.get(key), path)
+
+    def appended_since(self, key: str, path: str) -> Optional[int]:
+        """
+        Если файл с прошлой обработки только дописывался в конец, возвращает прежний размер
+        (смещение начала новых данных), иначе None.
+        """
+        entry = self.entries.get(key)
+        if entry is None or not os.path.exists(path):
+            return None
+        old_size = entry['size']
+        if old_size == 0 or os.path.getsize(path) <= old_size:
+            return None
+        with open(path, 'rb') as f:
+            f.seek(old_size - 1)
+            if f.read(1) != b'\n':
+                return None
+        if file_hash(path, old_size) != entry['sha256']:
+            return None
+        return old_size
+
+    def update(self, key: str, path: str):
+        self.entries[key] = file_fingerprint(path)
+
+    def save(self):
+        """Атомарно записывает манифест на диск"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(temp_path, self.path)
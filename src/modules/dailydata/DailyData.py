@@ -30,24 +30,91 @@ default_map = green_palette
 cmap = mood_palette
 
 
+# Форматы дат ежедневных данных, которые format='mixed' разбирает медленно (dateutil на каждое значение):
+# регулярное выражение значения -> явный формат. Для подходящих значений явный формат дает ту же дату,
+# что и mixed с dayfirst=True. ISO и даты с четырехзначным годом mixed и так разбирает быстро.
+# Двузначные годы берутся только 00-68: для 69-99 %y и dateutil выбирают разные века.
+DATE_FORMATS = [
+    (r'^\d{2}\.\d{2}\.(?:[0-5]\d|6[0-8])$', '%d.%m.%y'),  # data2_YYYY.csv
+    (r'^\d{2}/\d{2}/(?:[0-5]\d|6[0-8])$', '%d/%m/%y'),
+    (r'^\d{2}-\d{2}-(?:[0-5]\d|6[0-8])$', '%d-%m-%y'),
+]
+# Сколько значений смотреть, чтобы определить встречающиеся форматы
+DATE_SAMPLE_SIZE = 200
+
+
+def parse_dates_mixed(date_series: pd.Series) -> pd.Series:
+    """Робастный парсинг дат по значению (dateutil): поддержка смешанных форматов"""
+    # Первая попытка: mixed + dayfirst=True
+    parsed = pd.to_datetime(date_series, format='mixed', dayfirst=True, errors='coerce')
+    # Вторая попытка для неразобранных: mixed + dayfirst=False
+    mask_na = parsed.isna()
+    if mask_na.any():
+        parsed2 = pd.to_datetime(date_series[mask_na], format='mixed', dayfirst=False, errors='coerce')
+        parsed.loc[mask_na] = parsed2
+    # Третья попытка: общий парсер без формата (на случай ISO и пр.)
+    mask_na = parsed.isna()
+    if mask_na.any():
+        parsed3 = pd.to_datetime(date_series[mask_na], errors='coerce')
+        parsed.loc[mask_na] = parsed3
+    return parsed
+
+
+def parse_dates(date_series: pd.Series) -> pd.Series:
+    """
+    Разбирает строки дат: по выборке значений определяет встречающиеся форматы из DATE_FORMATS
+    и разбирает каждую группу одним вызовом с явным форматом. Значения, не подошедшие ни под один
+    формат, разбираются прежней цепочкой parse_dates_mixed. Неразобранные даты — NaT.
+    """
+    sample = date_series.sample(min(len(date_series), DATE_SAMPLE_SIZE), random_state=0)
+    formats = [(pattern, date_format) for pattern, date_format in DATE_FORMATS if sample.str.match(pattern).any()]
+    if not formats:
+        return parse_dates_mixed(date_series)
+
+    parsed = pd.Series(pd.NaT, index=date_series.index, dtype='datetime64[ns]')
+    rest = pd.Series(True, index=date_series.index)
+    for pattern, date_format in formats:
+        mask = rest & date_series.str.match(pattern)
+        parsed.loc[mask] = pd.to_datetime(date_series[mask], format=date_format, errors='coerce')
+        # Несуществующие по формату даты (например, 02/25/24) остаются для прежней цепочки
+        rest &= parsed.isna()
+
+    if rest.any():
+        parsed.loc[rest] = parse_dates_mixed(date_series[rest])
+    return parsed
+
+
+def read_daily_sources(source) -> pd.DataFrame:
+    """
+    Читает ежедневные данные из пути к csv, DataFrame или списка таких источников.
+    Несколько источников объединяются в памяти по столбцу Date (outer join).
+    """
+    if isinstance(source, pd.DataFrame):
+        return source.copy()
+    if isinstance(source, (list, tuple)):
+        if not source:
+            raise ValueError("Не переданы источники ежедневных данных")
+        frames = [read_daily_sources(item) for item in source]
+        df = frames[0]
+        for frame in frames[1:]:
+            df = pd.merge(df, frame, on='Date', how='outer')
+        return df
+    return pd.read_csv(source)
+
+
 class DailyData:
     def __init__(self,
-                 path_to_csv):
-        df = pd.read_csv(path_to_csv)
-        # Робастный парсинг дат: поддержка смешанных форматов
+                 source):
+        """
+        source: путь к csv, DataFrame или список источников (объединяются по столбцу Date)
+        """
+        df = read_daily_sources(source)
+        if isinstance(df.index, pd.DatetimeIndex) and df.index.name == 'Date':
+            # Уже разобранные данные (например, из FrameCache)
+            self.df = df
+            return
         date_series = df['Date'].astype(str).str.strip()
-        # Первая попытка: mixed + dayfirst=True
-        parsed = pd.to_datetime(date_series, format='mixed', dayfirst=True, errors='coerce')
-        # Вторая попытка для неразобранных: mixed + dayfirst=False
-        mask_na = parsed.isna()
-        if mask_na.any():
-            parsed2 = pd.to_datetime(date_series[mask_na], format='mixed', dayfirst=False, errors='coerce')
-            parsed.loc[mask_na] = parsed2
-        # Третья попытка: общий парсер без формата (на случай ISO и пр.)
-        mask_na = parsed.isna()
-        if mask_na.any():
-            parsed3 = pd.to_datetime(date_series[mask_na], errors='coerce')
-            parsed.loc[mask_na] = parsed3
+        parsed = parse_dates(date_series)
         # Если остались некорректные даты — бросаем осмысленную ошибку
         if parsed.isna().any():
             bad_examples = date_series[parsed.isna()].unique()[:5]
@@ -13,6 +13,8 @@ from datetime import datetime
 ORDERED_MOODS = ['awful', 'bad', 'meh', 'good', 'great']
 # The scale for your mood score. This means scores will be between 0 and range(SCALE)
 SCALE = 5
+# Окна тренда настроения (дней), которые отдает API: для каждого кэшируются свои ряды
+TREND_WINDOWS = (7, 30, 90)
 
 
 class DaylioJournal:
@@ -25,6 +27,20 @@ class DaylioJournal:
         self.scale = scale
         self.raw_data = pd.read_csv(path_to_csv, index_col=False)
         self.data = self.clean_df()
+        self.daily_mood = self.resample_daily()
+
+    @classmethod
+    def from_clean_data(cls, data, ordered_moods=ORDERED_MOODS, scale=SCALE):
+        """Создает журнал из уже очищенных данных (результат clean_df), например из FrameCache"""
+        journal = cls.__new__(cls)
+        journal.ordered_moods = ordered_moods
+        journal.scale = scale
+        journal.raw_data = None
+        data = data.copy()
+        data['mood'] = data['mood'].astype(object)
+        journal.data = data
+        journal.daily_mood = journal.resample_daily()
+        return journal
 
     def clean_df(self):
         df = self.raw_data.copy()
@@ -35,9 +51,13 @@ class DaylioJournal:
         # Проверяем и очищаем данные настроения
         df['mood'] = df['mood'].astype(str).str.strip()
 
-        # Заменяем настроения на числовые значения (исправляем предупреждение pandas)
+        # Заменяем настроения на числовые значения; неизвестные настроения (например, свои
+        # настроения Daylio) остаются в журнале с пустыми mood_num и mood_score
         mood_to_num = {mood: i for i, mood in enumerate(ordered_moods)}
-        df['mood_num'] = df['mood'].map(mood_to_num).astype(int)
+        df['mood_num'] = df['mood'].map(mood_to_num).astype('Int64')
+        unknown = df.loc[df['mood_num'].isna(), 'mood'].unique()
+        if len(unknown):
+            print(f"Неизвестные настроения не учитываются в оценках: {list(unknown)}")
 
         # Преобразуем дату в datetime с явным указанием формата
         try:
@@ -69,8 +89,9 @@ class DaylioJournal:
             "palette", colors, len(colors))
         df = self.data.copy()
         
-        # Убеждаемся, что mood_num является числовым
-        df['mood_num'] = pd.to_numeric(df['mood_num'], errors='coerce')
+        # Убеждаемся, что mood_num является числовым; записи с неизвестным настроением не рисуем
+        df['mood_num'] = pd.to_numeric(df['mood_num'], errors='coerce').astype(float)
+        df = df.dropna(subset=['mood_num'])
         
         # Фильтруем данные по году
         df_year = df[df.index.year == year]
@@ -84,36 +105,25 @@ class DaylioJournal:
                         linewidth=2.5)
         return fig
 
-    def gen_dots(self, matrix_length=30):
+    def mood_matrix(self, matrix_length=30):
         '''
-        Generates a matrix dot plot visualization representing all my moods over time.
+        Матрица настроений для точечной диаграммы: коды настроений (индексы в ordered_moods)
+        построчно по matrix_length записей. Хвост последней строки (и всегда хотя бы одна лишняя
+        строка) заполняется значением len(ordered_moods); им же отмечаются неизвестные настроения.
         '''
-        df = self.data
-
-        mood_categories = {}
-        category = 0
-        for mood in self.ordered_moods:
-            mood_categories[mood] = category
-            category += 1
-
-        mood_list = []
-        for mood in list(df.mood):
-            mood_list.append(mood_categories[mood])
+        filler = len(self.ordered_moods)
+        codes = pd.Categorical(self.data['mood'], categories=self.ordered_moods).codes.astype(int)
+        codes[codes < 0] = filler
 
-        next_round_value = matrix_length * \
-            (len(mood_list) // matrix_length + 1)
-        matrix_height = int(next_round_value / matrix_length)
-        mood_list_with_remainder = mood_list + \
-            [category] * (next_round_value - len(mood_list))
+        matrix_height = len(codes) // matrix_length + 1
+        codes = np.pad(codes, (0, matrix_height * matrix_length - len(codes)), constant_values=filler)
+        return codes.reshape(matrix_height, matrix_length)
 
-        all_mood_array = []
-
-        for x in range(matrix_height):
-            new_row = mood_list_with_remainder[(
-                x * matrix_length):((x + 1) * matrix_length)]
-            all_mood_array.append(new_row)
-
-        all_mood_array = np.array(all_mood_array)
+    def gen_dots(self, matrix_length=30):
+        '''
+        Generates a matrix dot plot visualization representing all my moods over time.
+        '''
+        all_mood_array = self.mood_matrix(matrix_length)
 
         plt.figure(figsize=(5, 5))
         colormap = colors.ListedColormap([
@@ -146,6 +156,55 @@ class DaylioJournal:
 
         return (df)
 
+    def resample_daily(self):
+        '''
+        Дневной ряд оценок настроения: среднее по записям за день, дни без записей — NaN.
+        Считается один раз при загрузке; на нем строятся скользящие средние и перцентили.
+        '''
+        self._rolling_cache = {}
+        scores = pd.to_numeric(self.data['mood_score'], errors='coerce').dropna()
+        if scores.empty:
+            return pd.Series(dtype=float, index=pd.DatetimeIndex([], name=self.data.index.name))
+        return scores.groupby(scores.index.normalize()).mean().asfreq('D')
+
+    def rolling_mood(self, window_size=30):
+        '''Скользящее среднее дневных оценок за window_size дней (кэшируется по размеру окна)'''
+        key = ('mean', window_size)
+        if key not in self._rolling_cache:
+            self._rolling_cache[key] = self.daily_mood.rolling(window_size, min_periods=1).mean()
+        return self._rolling_cache[key]
+
+    def mood_bands(self, window_size=30, percentiles=(10, 90)):
+        '''
+        Перцентили дневных оценок в скользящем окне: DataFrame со столбцами p10, p90 и т.п.
+        (кэшируется по окну и набору перцентилей)
+        '''
+        key = ('bands', window_size, tuple(percentiles))
+        if key not in self._rolling_cache:
+            rolling = self.daily_mood.rolling(window_size, min_periods=1)
+            self._rolling_cache[key] = pd.DataFrame({f"p{p}": rolling.quantile(p / 100) for p in percentiles})
+        return self._rolling_cache[key]
+
+    def mood_trend(self, window_size=30, year=None):
+        '''
+        Тренд настроения: скользящее среднее дневных оценок за window_size дней
+        (основа графика тренда и API).
+
+        Входные параметры:
+            window_size: int, размер окна в днях
+            year: int, год; если None — все данные
+        Выходные данные:
+            pd.Series с индексом по дням (дни, для которых в окне нет записей, пропущены)
+        '''
+        trend = self.rolling_mood(window_size)
+        if year is not None:
+            trend = trend[trend.index.year == year]
+        trend = trend.dropna()
+
+        if trend.empty:
+            raise ValueError(f"Нет данных для отображения за {year} год")
+        return trend
+
     def gen_mood_trend_line(self, window_size=30, year=None):
         '''
         Создает линейный график тренда настроения с использованием скользящего среднего.
@@ -156,28 +215,7 @@ class DaylioJournal:
         Выходные данные:
             PyPlot figure
         '''
-        df = self.data.copy()
-
-        # Убеждаемся, что mood_score является числовым
-        df['mood_score'] = pd.to_numeric(df['mood_score'], errors='coerce')
-        
-        # Удаляем строки с NaN значениями
-        df = df.dropna(subset=['mood_score'])
-
-        # Фильтруем данные по году, если указан
-        if year is not None:
-            df = df[df.index.year == year]
-
-        # Проверяем, что у нас есть данные для отображения
-        if df.empty:
-            raise ValueError(f"Нет данных для отображения за {year} год")
-
-        # Сортируем данные по дате
-        df = df.sort_index()
-
-        # Вычисляем скользящее среднее
-        df['mood_score_ma'] = df['mood_score'].rolling(
-            window=window_size, min_periods=1).mean()
+        df = self.mood_trend(window_size, year).to_frame('mood_score_ma')
 
         # Создаем новый график
         plt.figure(figsize=(15, 6))
@@ -2,31 +2,116 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
 import altair as alt
 import calendar
 
-from modules.ActivityInfo import ActivityInfo
+from modules.ActivityInfo import ActivityInfo, activity_registry
+
+# Формат Start/End в файлах time_YYYY.csv
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
 
 def get_fake_time(x: str, morning: bool):
-    dt = datetime.strptime(x, u'%Y-%m-%d %H:%M:%S')
+    dt = datetime.strptime(x, TIME_FORMAT)
     if morning:
         dt = dt.replace(hour=0, minute=0, second=0)
     else:
         dt = dt.replace(hour=23, minute=59, second=59)
     return dt
 
+# Периоды агрегации: номер периода по столбцу Start и полный диапазон номеров
+PERIODS = {
+    'day': (lambda start: start.dt.dayofyear, range(1, 367)),
+    'week': (lambda start: start.dt.isocalendar().week, range(1, 54)),
+    'month': (lambda start: start.dt.month, range(1, 13)),
+    'quarter': (lambda start: start.dt.quarter, range(1, 5)),
+    'year': (lambda start: start.dt.year, None),
+}
+
+
+def get_type(activity: str) -> str:
+    """Тип активности для отчетов: группа до двоеточия"""
+    if activity.startswith(':'):
+        return activity.split(':')[1]
+    if ':' in activity:
+        return activity.split(':', 1)[0]
+    return activity
+
+
+def split_daily_segments(df: pd.DataFrame):
+    """
+    Разбивает активности на отрезки в пределах одних суток.
+    Активность, переходящая через полночь, дает два отрезка: до 24:00 и после 00:00.
+    Возвращает DataFrame отрезков (Activity, x — номер дня, Bottom/Top — часы) в порядке строк df
+    и отсортированный DatetimeIndex дней, на которые ссылается x.
+    """
+    start_day = df['Start'].dt.normalize()
+    end_day = df['End'].dt.normalize()
+    start_time = df['Start'].dt.hour + df['Start'].dt.minute / 60
+    end_time = df['End'].dt.hour + df['End'].dt.minute / 60
+    crosses = start_day != end_day
+    order = np.arange(len(df)) * 2
+
+    segments = pd.concat([
+        pd.DataFrame({'Activity': df['Activity'], 'Day': start_day,
+                      'Bottom': start_time, 'Top': end_time.where(~crosses, 24), 'Order': order}),
+        pd.DataFrame({'Activity': df['Activity'], 'Day': end_day,
+                      'Bottom': 0, 'Top': end_time, 'Order': order + 1})[crosses],
+    ], ignore_index=True)
+    # Отрезок после полуночи рисуется сразу за своим первым отрезком, как прежде
+    segments = segments.sort_values('Order').drop(columns='Order').reset_index(drop=True)
+
+    unique_dates = pd.DatetimeIndex(pd.concat([start_day, end_day]).unique()).sort_values()
+    segments['x'] = unique_dates.get_indexer(segments['Day'])
+    return segments, unique_dates
+
+
+def segment_rectangles(segments: pd.DataFrame) -> np.ndarray:
+    """Вершины прямоугольников шириной в один день для PolyCollection"""
+    x = segments['x'].to_numpy(dtype=float)
+    bottom = segments['Bottom'].to_numpy(dtype=float)
+    top = segments['Top'].to_numpy(dtype=float)
+    return np.stack([
+        np.column_stack([x - 0.5, bottom]),
+        np.column_stack([x - 0.5, top]),
+        np.column_stack([x + 0.5, top]),
+        np.column_stack([x + 0.5, bottom]),
+    ], axis=1)
+
+
+def read_time_csv(path_to_csv: str) -> pd.DataFrame:
+    """
+    Читает time_YYYY.csv и разбирает даты — самая дорогая часть загрузки TimeData.
+    Результат (Activity как категория) пригоден для хранения в FrameCache и передачи в TimeData.
+    """
+    df = pd.read_csv(path_to_csv, on_bad_lines="warn", sep=",")
+    df = df.loc[:, ~df.columns.str.contains('^Unnamed')]  # удалаяем битые столбцы
+
+    # Каждый столбец разбирается один раз по известному формату,
+    # начало и конец суток считаются из уже разобранных дат
+    df['Start'] = pd.to_datetime(df['Start'], format=TIME_FORMAT)
+    df['End'] = pd.to_datetime(df['End'], format=TIME_FORMAT)
+    df['Start0'] = df['Start'].dt.normalize()
+    df['End0'] = df['End'].dt.normalize() + pd.Timedelta(hours=23, minutes=59, seconds=59)
+    df['Activity'] = df['Activity'].astype('category')
+    return df
+
+
 class TimeData:
     def __init__(self,
-                 path_to_csv: str):
-        df = pd.read_csv(path_to_csv, on_bad_lines="warn", sep=",")
+                 source):
+        """
+        source: путь к time_YYYY.csv или DataFrame, полученный из read_time_csv
+        """
+        if isinstance(source, pd.DataFrame):
+            df = source.copy()
+        else:
+            df = read_time_csv(source)
+        df['Activity'] = df['Activity'].astype(object)
         self.activities = df.Activity.unique()
 
-        df['Start0'] = df['Start'].apply(lambda x: get_fake_time(x, True))
-        df['End0'] = df['End'].apply(lambda x: get_fake_time(x, False))
-        df['Start'] = pd.to_datetime(df['Start'])
-        df['End'] = pd.to_datetime(df['End'])
         df['Activity'] = df['Activity'].replace(' ', '', regex=True)
-        df = df.loc[:, ~df.columns.str.contains('^Unnamed')]  # удалаяем битые столбцы
         self.df = df
 
         df_groupped = df.copy()
@@ -41,81 +126,98 @@ class TimeData:
 
         self.year = df.Start.min().year
 
-        self.activityInfo = ActivityInfo()
+        self.work_mask = df['Activity'].str.contains('Work', regex=False, na=False)
+        self._period_keys = {}
 
 
-    def get_by_week(self, work: bool):
-        weeks = range(1, 54)
-        dfy = pd.DataFrame(0, index=np.arange(len(weeks)),
-                        columns=np.hstack(['week', self.activities]))
-        dfy['week'] = weeks
-        dfy = dfy.set_index('week')
-
-        dfy["Work"] = 0
-
-        for index, row in self.df.iterrows():
-            if "Work" in row.Activity:
-                if not work:
-                    continue
-                dfy["Work"].iloc[row.Start.week - 1] += row.Total
-                continue
-
-            # Проверяем, существует ли столбец для данной активности
-            if row.Activity in dfy.columns:
-                dfy[row.Activity].iloc[row.Start.week - 1] += row.Total
-            else:
-                # Если столбца нет, добавляем его
-                dfy[row.Activity] = 0
-                dfy[row.Activity].iloc[row.Start.week - 1] += row.Total
+    @property
+    def activityInfo(self) -> ActivityInfo:
+        """Общий ActivityInfo из реестра (файлы цветов читаются один раз на процесс)"""
+        return activity_registry.get()
 
-        # удаляем столбцы, в которых все нули
-        dfy = dfy.loc[:, (dfy != 0).any(axis=0)]
-        dfy.iloc[:, :] = dfy.iloc[:, :].div(60, axis=0)  # minutes to hours
 
-        colors = []
+    def period_key(self, by: str) -> pd.Series:
+        """Возвращает номер периода by для каждой записи (считается один раз)"""
+        if by not in PERIODS:
+            raise ValueError(f"by должен быть одним из {list(PERIODS)}")
+        if by not in self._period_keys:
+            self._period_keys[by] = PERIODS[by][0](self.df['Start']).astype(int)
+        return self._period_keys[by]
 
-        for c in dfy.columns:
-            colors.append(self.activityInfo.get_activity_color(c))
 
-        return dfy, colors
+    def aggregate_long(self, by: str = 'week', labels: pd.Series = None, work: bool = True,
+                       per_year: bool = False) -> pd.Series:
+        """
+        Суммирует Total (в минутах) по периодам и группам одним проходом groupby.
+
+        by: 'day', 'week', 'month', 'quarter' или 'year'
+        labels: название группы для каждой записи (по умолчанию — активность,
+                все Work-активности объединены в "Work")
+        work: учитывать ли Work-активности
+        per_year: добавлять ли год в индекс
+        Возвращает Series с индексом ([Year,] Period, Label) только по встречающимся сочетаниям
+        """
+        if labels is None:
+            labels = self.activity_labels()
+        keys = [self.period_key(by).rename('Period')]
+        if per_year:
+            keys.insert(0, self.period_key('year').rename('Year'))
 
+        total = self.df['Total']
+        if not work:
+            total = total[~self.work_mask]
+        return total.groupby(keys + [labels.rename('Label')]).sum()
+
+
+    def aggregate(self, by: str = 'week', labels: pd.Series = None, work: bool = True,
+                  per_year: bool = False) -> pd.DataFrame:
+        """
+        Широкая форма aggregate_long: индекс — период (или год и период), столбцы — группы
+        """
+        return self.aggregate_long(by, labels, work, per_year).unstack('Label', fill_value=0)
+
+
+    def activity_labels(self) -> pd.Series:
+        """Активности записей, где все Work-активности объединены в одну Work"""
+        return self.df['Activity'].where(~self.work_mask, 'Work')
 
-    def get_by_month(self, work: bool):
-        months = range(1, 13)
-        dfy = pd.DataFrame(0, index=np.arange(len(months)),
-                           columns=np.hstack(['month', self.activities]))
-        dfy['month'] = months
-        dfy = dfy.set_index('month')
-
-        dfy["Work"] = 0
-
-        for index, row in self.df.iterrows():
-            if "Work" in row.Activity:
-                if not work:
-                    continue
-                dfy["Work"].iloc[row.Start.month - 1] += row.Total
-                continue
-
-            # Проверяем, существует ли столбец для данной активности
-            if row.Activity in dfy.columns:
-                dfy[row.Activity].iloc[row.Start.month - 1] += row.Total
-            else:
-                # Если столбца нет, добавляем его
-                dfy[row.Activity] = 0
-                dfy[row.Activity].iloc[row.Start.month - 1] += row.Total
+
+    def get_by_period(self, by: str, work: bool):
+        totals = self.aggregate(by, work=work)
+
+        # Порядок столбцов: исходные активности, "Work", затем новые названия по мере появления
+        columns = list(self.activities)
+        if 'Work' not in columns:
+            columns.append('Work')
+        labels = self.activity_labels()
+        if not work:
+            labels = labels[~self.work_mask]
+        known = set(columns)
+        columns += [c for c in labels.unique() if c not in known]
+
+        periods = PERIODS[by][1]
+        if periods is None:
+            periods = sorted(totals.index)
+        dfy = totals.reindex(index=periods, columns=columns, fill_value=0)
+        dfy.index.name = by
 
         # удаляем столбцы, в которых все нули
         dfy = dfy.loc[:, (dfy != 0).any(axis=0)]
-        dfy.iloc[:, :] = dfy.iloc[:, :].div(60, axis=0)  # minutes to hours
+        dfy = dfy.div(60).astype(float)  # minutes to hours
 
-        colors = []
-
-        for c in dfy.columns:
-            colors.append(self.activityInfo.get_activity_color(c))
+        colors = self.activityInfo.get_colors(dfy.columns).tolist()
 
         return dfy, colors
 
 
+    def get_by_week(self, work: bool):
+        return self.get_by_period('week', work)
+
+
+    def get_by_month(self, work: bool):
+        return self.get_by_period('month', work)
+
+
     def draw_plot(self, level:str, work:bool):
         if level == "week":
             dfy, colors = self.get_by_week(work)
@@ -197,45 +299,15 @@ class TimeData:
         # Создаем фигуру и оси
         fig, ax = plt.subplots(figsize=(15, 8))
 
-        # Получаем уникальные даты для настройки оси X (включая даты начала и окончания)
-        start_dates = set(df_filtered['Start'].dt.date)
-        end_dates = set(df_filtered['End'].dt.date)
-        unique_dates = sorted(start_dates.union(end_dates))
-
-        # Создаем словарь для маппинга дат на целые числа
-        date_to_num = {date: i for i, date in enumerate(unique_dates)}
-
-        # Создаем словарь для хранения уникальных активностей и их цветов
+        # Разбиваем активности на отрезки в пределах суток и рисуем их одной коллекцией
+        # прямоугольников в порядке записей: пересекающиеся записи накладываются как прежде
+        segments, unique_dates = split_daily_segments(df_filtered)
         unique_activities = df_filtered['Activity'].unique()
+        activity_info = self.activityInfo
+        colors = activity_info.get_colors(segments['Activity'])
 
-        # Для каждой активности создаем прямоугольник
-        for idx, row in df_filtered.iterrows():
-            start_date = row['Start'].date()
-            end_date = row['End'].date()
-
-            # Если активность заканчивается на следующий день
-            if start_date != end_date:
-                # Первая часть активности (до полуночи)
-                x_pos = date_to_num[start_date]
-                start_time = row['Start'].hour + row['Start'].minute / 60
-                ax.bar(x_pos, 24 - start_time, bottom=start_time, width=1.0,
-                    color=self.activityInfo.get_activity_color(row['Activity']),
-                    label=row['Activity'] if idx == 0 else "", alpha=0.7)
-
-                # Вторая часть активности (после полуночи)
-                x_pos = date_to_num[end_date]
-                end_time = row['End'].hour + row['End'].minute / 60
-                ax.bar(x_pos, end_time, bottom=0, width=1.0, 
-                       color=self.activityInfo.get_activity_color(row['Activity']), 
-                       alpha=0.7)
-            else:
-                # Обычная активность в пределах одного дня
-                x_pos = date_to_num[start_date]
-                start_time = row['Start'].hour + row['Start'].minute / 60
-                end_time = row['End'].hour + row['End'].minute / 60
-                ax.bar(x_pos, end_time - start_time, bottom=start_time, width=1.0,
-                    color=self.activityInfo.get_activity_color(row['Activity']),
-                    label=row['Activity'] if idx == 0 else "", alpha=0.7)
+        ax.add_collection(PolyCollection(
+            segment_rectangles(segments), facecolors=list(colors), edgecolors='none', alpha=0.7))
 
         # Настраиваем оси
         ax.set_ylim(24, 0)  # Инвертируем ось Y
@@ -249,8 +321,7 @@ class TimeData:
 
         # Настраиваем ось X
         ax.set_xticks(range(len(unique_dates)))
-        ax.set_xticklabels([date.strftime('%Y-%m-%d')
-                        for date in unique_dates], rotation=45)
+        ax.set_xticklabels(unique_dates.strftime('%Y-%m-%d'), rotation=45)
 
         # Устанавливаем пределы оси X, чтобы убрать отступы
         ax.set_xlim(-0.5, len(unique_dates) - 0.5)
@@ -262,7 +333,7 @@ class TimeData:
         handles, labels = [], []
         for activity in unique_activities:
             handle = plt.Rectangle(
-                (0, 0), 1, 1, color=self.activityInfo.get_activity_color(activity), alpha=0.7)
+                (0, 0), 1, 1, color=activity_info.get_activity_color(activity), alpha=0.7)
             handles.append(handle)
             labels.append(activity)
         plt.legend(handles, labels, bbox_to_anchor=(1.05, 1), loc='upper left')
@@ -278,60 +349,68 @@ class TimeData:
 
         return fig
 
-    def generate_report(self, by='week', years=None, to_csv=None, to_excel=None, work=True):
+    def report_table(self, work=True) -> pd.DataFrame:
+        """
+        Длинная таблица для отчетов: одна строка на (год, тип, день) с суммой Total в минутах.
+        Считается одним проходом groupby; из нее без повторного прохода по записям
+        строятся отчеты по любому периоду (см. iter_report_views).
+        work: учитывать ли Work-активности
+        """
+        df = self.df if work else self.df[~self.work_mask]
+        keys = [
+            self.period_key('year').rename('Year'),
+            df['Activity'].map(get_type).rename('Type'),
+            df['Start'].dt.normalize().rename('Date'),
+        ]
+        return df['Total'].groupby(keys).sum().reset_index()
+
+    def iter_report_views(self, table: pd.DataFrame, by='week', years=None):
+        """
+        Строит из report_table широкие отчеты по годам: строки — типы, столбцы — периоды (часы).
+        Отдает пары (год, DataFrame) по одной, не держа в памяти все года сразу.
+        """
+        if by not in PERIODS:
+            raise ValueError(f"by должен быть одним из {list(PERIODS)}")
+        table = table.assign(Period=PERIODS[by][0](table['Date']).astype(int))
+        # Только позиции строк каждого года; сами срезы строятся по одному при выдаче
+        positions = table.groupby('Year').indices
+        if years is None:
+            years = sorted(positions)
+        for year in years:
+            if year in positions:
+                dfy = table.iloc[positions[year]]
+                report_df = dfy.groupby(['Type', 'Period'])['Total'].sum().unstack('Period', fill_value=0)
+            else:
+                report_df = pd.DataFrame(dtype=float)
+            periods = PERIODS[by][1] or sorted(report_df.columns)
+            report_df = report_df.reindex(columns=periods, fill_value=0) / 60  # часы
+            report_df.index.name = None
+            report_df.columns = [f'{by}_{p}' for p in periods]
+            yield year, report_df
+
+    def generate_report(self, by='week', years=None, to_csv=None, to_excel=None, work=True, table=None):
         """
-        Генерирует отчеты по неделям или месяцам для каждого года.
+        Генерирует отчеты по периодам для каждого года.
         Возвращает словарь: {год: DataFrame}
-        by: 'week' или 'month'
+        by: 'day', 'week', 'month', 'quarter' или 'year'
         years: список лет (по умолчанию все года в данных)
         to_csv: путь к папке для сохранения csv (если None, не сохраняет)
         to_excel: путь к файлу для сохранения excel (если None, не сохраняет)
         work: учитывать ли Work-активности
+        table: готовая report_table, чтобы не пересчитывать ее для нескольких отчетов
         """
-        df = self.df.copy()
-        df['Year'] = df['Start'].dt.year
-        all_years = sorted(df['Year'].unique())
-        if years is None:
-            years = all_years
+        if table is None:
+            table = self.report_table(work=work)
         reports = {}
         excel_writer = None
         if to_excel:
             excel_writer = pd.ExcelWriter(to_excel, engine='xlsxwriter')
-        for year in years:
-            dfy = df[df['Year'] == year]
-            if by == 'week':
-                dfy['Period'] = dfy['Start'].dt.isocalendar().week
-                periods = range(1, 54)
-                period_name = 'week'
-            elif by == 'month':
-                dfy['Period'] = dfy['Start'].dt.month
-                periods = range(1, 13)
-                period_name = 'month'
-            else:
-                raise ValueError("by должен быть 'week' или 'month'")
-            # Группировка по типу
-            def get_type(activity):
-                if activity.startswith(':'):
-                    return activity.split(':')[1]
-                if ':' in activity:
-                    return activity.split(':', 1)[0]
-                return activity
-            dfy['Type'] = dfy['Activity'].apply(get_type)
-            types = sorted(dfy['Type'].unique())
-            data = []
-            for t in types:
-                row = []
-                for period in periods:
-                    mask = (dfy['Type'] == t) & (dfy['Period'] == period)
-                    total = dfy.loc[mask, 'Total'].sum() / 60  # часы
-                    row.append(total)
-                data.append(row)
-            report_df = pd.DataFrame(data, index=types, columns=[f'{period_name}_{p}' for p in periods])
+        for year, report_df in self.iter_report_views(table, by, years):
             reports[year] = report_df
             if to_csv:
                 report_df.to_csv(f"{to_csv}/report_{by}_{year}.csv", encoding='utf-8')
             if excel_writer:
                 report_df.to_excel(excel_writer, sheet_name=f'{by}_{year}')
         if excel_writer:
-            excel_writer.save()
+            excel_writer.close()
         return reports
@@ -1,14 +1,12 @@
-import pandas as pd
+from typing import Dict, Optional
 
+from modules.timedata.adapters import import_source
 
-def create_temp_timedata_from_TouchTime(file: str):
-    df = pd.read_csv(file)
-    df['Start'] = pd.to_datetime(df['Start'])
-    df['End'] = pd.to_datetime(df['End'])
-    df = df.loc[:, ~df.columns.str.contains('^Unnamed')]  # удалаяем битые столбцы
-    df['Total'] = ((df['End']-df['Start']).dt.total_seconds() / 60).astype(int)
 
-    years = df['Start'].dt.year.unique()
-    for year in years:
-        dfy = df[df['Start'].dt.year == year]
-        dfy.to_csv(f'temp/time_{year}_0.csv')
+def create_temp_timedata_from_TouchTime(file: str, output_dir: str = 'temp', incremental: bool = False,
+                                        state_file: Optional[str] = None) -> Dict[int, int]:
+    """
+    Импортирует экспорт TouchTime в файлы output_dir/time_YYYY_0.csv (см. adapters.import_source).
+    incremental: добавить только записи новее прошлого импорта прямо в output_dir/time_YYYY.csv
+    """
+    return import_source('TouchTime', file, output_dir, incremental=incremental, state_file=state_file)
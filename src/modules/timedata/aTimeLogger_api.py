@@ -1,29 +1,14 @@
-import pandas as pd
-from datetime import datetime
+from typing import Dict, Optional
 
-def timeToDay(x: str):
-    return datetime.strptime(x, u'%Y-%m-%d %H:%M')
+from modules.timedata.adapters import CHUNK_SIZE, import_source
 
-def add_group(x: str):
-    if len(x) == 0:
-        return ""
 
-    return x + ":"
-
-def create_temp_timedata_from_aTimeLogger(file: str):
-    df = pd.read_csv(file, on_bad_lines="warn", sep=",")
-    df = df.fillna('')
-    df['Start'] = df['Начало'].apply(lambda x: timeToDay(x))
-    df['End'] = df['Конец'].apply(lambda x: timeToDay(x))
-    df['Group'] = df["Group"].apply(lambda x: add_group(x))
-    df['Group'] = df['Group'] + df["Group.1"]
-    df['Activity'] = df['Group'] + ":" + df['Тип']
-    df['Total'] = ((df['End']-df['Start']).dt.total_seconds() / 60).astype(int)
-
-    df = df.drop(columns=["Комментарий", "Тип", "Начало",
-                "Конец", "Продолжительность", "Group", "Group.1"])
-    
-    years = df['Start'].dt.year.unique()
-    for year in years:
-        dfy = df[df['Start'].dt.year == year]
-        dfy.to_csv(f'temp/time_{year}_1.csv')
+def create_temp_timedata_from_aTimeLogger(file: str, output_dir: str = 'temp', chunksize: int = CHUNK_SIZE,
+                                          incremental: bool = False,
+                                          state_file: Optional[str] = None) -> Dict[int, int]:
+    """
+    Импортирует экспорт aTimeLogger в файлы output_dir/time_YYYY_1.csv (см. adapters.import_source).
+    incremental: добавить только записи новее прошлого импорта прямо в output_dir/time_YYYY.csv
+    """
+    return import_source('aTimeLogger', file, output_dir, chunksize, incremental=incremental,
+                         state_file=state_file)
@@ -0,0 +1,162 @@
+import os
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from modules.timedata.incremental_import import import_new_rows, record_pending_watermark, rows_watermark
+
+# Сколько строк экспорта читать за раз: память не растет с размером экспорта
+CHUNK_SIZE = 50000
+
+
+class SourceAdapter:
+    """
+    Описание источника данных времени: какие столбцы экспорта чем являются и в каком формате даты.
+    Чтение кусками, разбор дат, расчет Total, разбиение по годам и запись — общие для всех
+    источников (import_source).
+    """
+    def __init__(self, name: str, part: int, start_column: str = 'Start', end_column: str = 'End',
+                 date_format: Optional[str] = None,
+                 activity: Optional[Callable[[pd.DataFrame], pd.Series]] = None,
+                 drop_columns: Iterable[str] = (), drop_unnamed: bool = False,
+                 fillna: Optional[str] = None, read_options: Optional[Dict] = None):
+        """
+        Args:
+            name: Название источника (ключ в реестре и в водяных знаках инкрементального импорта)
+            part: Номер части в файлах time_YYYY_N.csv
+            start_column, end_column: Столбцы начала и конца записи в экспорте
+            date_format: Формат дат (None — определяется pandas)
+            activity: Функция, строящая столбец Activity по куску экспорта (None — он уже есть)
+            drop_columns: Столбцы экспорта, которые не попадают в time_YYYY.csv
+            drop_unnamed: Удалять безымянные (битые) столбцы
+            fillna: Чем заполнить пустые значения перед разбором
+            read_options: Дополнительные аргументы pd.read_csv
+        """
+        self.name = name
+        self.part = part
+        self.start_column = start_column
+        self.end_column = end_column
+        self.date_format = date_format
+        self.activity = activity
+        self.drop_columns = list(drop_columns)
+        self.drop_unnamed = drop_unnamed
+        self.fillna = fillna
+        self.read_options = read_options or {}
+
+    def read_chunks(self, file: str, chunksize: int = CHUNK_SIZE):
+        return pd.read_csv(file, chunksize=chunksize, **self.read_options)
+
+    def convert(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Переводит кусок экспорта в формат time_YYYY.csv (Start, End, Activity, Total)"""
+        if self.drop_unnamed:
+            df = df.drop(columns=df.columns[df.columns.str.contains('^Unnamed')])  # удаляем битые столбцы
+        if self.fillna is not None:
+            df = df.fillna(self.fillna)
+        df['Start'] = pd.to_datetime(df[self.start_column], format=self.date_format)
+        df['End'] = pd.to_datetime(df[self.end_column], format=self.date_format)
+        if self.activity is not None:
+            df['Activity'] = self.activity(df)
+        df['Total'] = ((df['End']-df['Start']).dt.total_seconds() / 60).astype(int)
+        return df.drop(columns=self.drop_columns)
+
+
+# Зарегистрированные источники: название -> SourceAdapter
+ADAPTERS = {}
+
+
+def register_adapter(adapter: SourceAdapter) -> SourceAdapter:
+    """Добавляет источник в реестр; источник с тем же названием заменяется"""
+    ADAPTERS[adapter.name] = adapter
+    return adapter
+
+
+def get_adapter(name: str) -> SourceAdapter:
+    if name not in ADAPTERS:
+        raise ValueError(f"Неизвестный источник данных времени: {name}")
+    return ADAPTERS[name]
+
+
+def import_source(adapter, file: str, output_dir: str = 'temp', chunksize: int = CHUNK_SIZE,
+                  incremental: bool = False, state_file: Optional[str] = None) -> Dict[int, int]:
+    """
+    Импортирует экспорт источника за один проход: экспорт читается кусками, каждый кусок
+    дописывается в файлы output_dir/time_YYYY_N.csv своих лет (N — часть источника).
+    Последняя запись экспорта запоминается как водяной знак для инкрементального импорта; он вступает
+    в силу после merge_timedata (порядок: полный импорт -> merge_timedata -> инкрементальный импорт).
+    incremental: добавить только записи новее прошлого импорта прямо в output_dir/time_YYYY.csv
+    (водяной знак хранится в state_file, по умолчанию output_dir/import_state.json)
+    Возвращает число записей по годам.
+    """
+    if isinstance(adapter, str):
+        adapter = get_adapter(adapter)
+
+    if incremental:
+        chunks = adapter.read_chunks(file, chunksize)
+        return import_new_rows((adapter.convert(chunk) for chunk in chunks), adapter.name, output_dir, state_file)
+
+    started = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = {}
+    rows = {}
+    watermark = None
+    try:
+        for chunk in adapter.read_chunks(file, chunksize):
+            df = adapter.convert(chunk)
+            last = rows_watermark(df)
+            if last is not None and (watermark is None or last > watermark):
+                watermark = last
+            for year, dfy in df.groupby(df['Start'].dt.year, sort=False):
+                if year not in outputs:
+                    outputs[year] = open(os.path.join(output_dir, f'time_{year}_{adapter.part}.csv'), 'w',
+                                         newline='', encoding='utf-8')
+                dfy.to_csv(outputs[year], header=year not in rows)
+                rows[year] = rows.get(year, 0) + len(dfy)
+    finally:
+        for output in outputs.values():
+            output.close()
+    record_pending_watermark(adapter.name, adapter.part, watermark, list(rows), output_dir, state_file)
+
+    elapsed = time.perf_counter() - started
+    total = sum(rows.values())
+    print(f"{adapter.name}: импортировано {total} записей за {elapsed:.2f} с "
+          f"({total / elapsed if elapsed else 0:.0f} строк/с)")
+    return rows
+
+
+def import_sources(jobs: List[Tuple[str, str]], output_dir: str = 'temp', max_workers: int = 2,
+                   **options) -> Dict[str, Dict[int, int]]:
+    """
+    Импортирует несколько экспортов одновременно: jobs — пары (источник, файл).
+    Возвращает число записей по годам для каждого источника.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [(name, executor.submit(import_source, name, file, output_dir, **options))
+                   for name, file in jobs]
+        return {name: future.result() for name, future in futures}
+
+
+def add_group(x: pd.Series) -> pd.Series:
+    """Непустая группа дополняется двоеточием: "Sport" -> "Sport:" """
+    return x.where(x.str.len() == 0, x + ":")
+
+
+def aTimeLogger_activity(df: pd.DataFrame) -> pd.Series:
+    """Activity aTimeLogger: "группа:подгруппа:тип" """
+    group = add_group(df["Group"].astype(str)) + df["Group.1"].astype(str)
+    return group + ":" + df['Тип']
+
+
+register_adapter(SourceAdapter(
+    'TouchTime', part=0,
+    drop_unnamed=True,
+))
+
+register_adapter(SourceAdapter(
+    'aTimeLogger', part=1,
+    start_column='Начало', end_column='Конец', date_format='%Y-%m-%d %H:%M',
+    activity=aTimeLogger_activity,
+    drop_columns=["Комментарий", "Тип", "Начало", "Конец", "Продолжительность", "Group", "Group.1"],
+    fillna='',
+    read_options={'on_bad_lines': "warn", 'sep': ","},
+))
@@ -0,0 +1,243 @@
+import json
+import os
+import threading
+from io import StringIO
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from modules.timedata.TimeData import TIME_FORMAT
+
+# Запись в time_YYYY.csv и файл водяных знаков при одновременном импорте нескольких источников
+_write_lock = threading.Lock()
+
+
+class ImportState:
+    """
+    Водяные знаки инкрементального импорта: для каждого источника — последняя импортированная
+    запись (Start, Activity). Хранится в json-файле рядом с файлами time_YYYY.csv.
+    Водяной знак полного импорта сначала ждет в pending (по номеру части) и становится
+    водяным знаком источника, когда merge_timedata сольет все года этой части в time_YYYY.csv.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.watermarks = {}
+        self.pending = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.watermarks = json.load(f)
+            self.pending = self.watermarks.pop('_pending', {})
+
+    def get(self, source: str) -> Optional[Tuple[pd.Timestamp, str]]:
+        watermark = self.watermarks.get(source)
+        if watermark is None:
+            return None
+        return pd.Timestamp(watermark[0]), watermark[1]
+
+    def set(self, source: str, watermark: Tuple[pd.Timestamp, str]):
+        self.watermarks[source] = [watermark[0].strftime(TIME_FORMAT), watermark[1]]
+
+    def update(self, source: str, rows: pd.DataFrame):
+        """Сдвигает водяной знак источника на последнюю из rows запись"""
+        watermark = rows_watermark(rows)
+        if watermark is None:
+            return
+        current = self.get(source)
+        if current is None or watermark > current:
+            self.set(source, watermark)
+
+    def set_pending(self, part: int, source: str, watermark: Tuple[pd.Timestamp, str], years: List[int]):
+        """Водяной знак полного импорта, записавшего части time_YYYY_<part>.csv за years"""
+        self.pending[str(part)] = {
+            'source': source,
+            'watermark': [watermark[0].strftime(TIME_FORMAT), watermark[1]],
+            'years': sorted(int(year) for year in years),
+        }
+
+    def merged(self, part: int, years: Iterable[int]):
+        """Отмечает слитые года части; когда слиты все, водяной знак части переходит к источнику"""
+        entry = self.pending.get(str(part))
+        if entry is None:
+            return
+        entry['years'] = [year for year in entry['years'] if year not in set(years)]
+        if not entry['years']:
+            # time_YYYY.csv пересобран из частей: водяной знак — ровно последняя запись экспорта
+            self.watermarks[entry['source']] = entry['watermark']
+            del self.pending[str(part)]
+
+    def has_pending(self, source: str) -> bool:
+        return any(entry['source'] == source for entry in self.pending.values())
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = self.path + '.tmp'
+        data = dict(self.watermarks)
+        if self.pending:
+            data['_pending'] = self.pending
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+
+def state_path(output_dir: str, state_file: Optional[str] = None) -> str:
+    """Файл водяных знаков: по умолчанию рядом с файлами time_YYYY.csv"""
+    return state_file or os.path.join(output_dir, 'import_state.json')
+
+
+def rows_watermark(rows: pd.DataFrame) -> Optional[Tuple[pd.Timestamp, str]]:
+    """Водяной знак (Start, Activity) последней из rows записи; None для пустых rows"""
+    if rows.empty:
+        return None
+    last = rows.sort_values(['Start', 'Activity']).iloc[-1]
+    return last['Start'], last['Activity']
+
+
+def record_pending_watermark(source: str, part: int, watermark: Optional[Tuple[pd.Timestamp, str]],
+                             years: Iterable[int], output_dir: str, state_file: Optional[str] = None):
+    """
+    Запоминает водяной знак полного импорта части part. Он вступит в силу, когда merge_timedata
+    сольет части в time_YYYY.csv (merged_parts): до этого записей экспорта в time_YYYY.csv нет
+    """
+    if watermark is None:
+        return
+    with _write_lock:
+        state = ImportState(state_path(output_dir, state_file))
+        state.set_pending(part, source, watermark, years)
+        state.save()
+
+
+def merged_parts(parts_years: Dict[int, List[int]], folder: str, state_file: Optional[str] = None):
+    """Отмечает части, слитые merge_timedata в folder/time_YYYY.csv: {часть: [года]}"""
+    with _write_lock:
+        path = state_path(folder, state_file)
+        if not os.path.exists(path):
+            return
+        state = ImportState(path)
+        if not state.pending:
+            return
+        for part, years in parts_years.items():
+            state.merged(part, years)
+        state.save()
+
+
+def newer_rows(df: pd.DataFrame, watermark: Optional[Tuple[pd.Timestamp, str]]) -> pd.DataFrame:
+    """Записи, идущие после водяного знака (Start, Activity)"""
+    if watermark is None:
+        return df
+    start, activity = watermark
+    mask = (df['Start'] > start) | ((df['Start'] == start) & (df['Activity'].astype(str) > activity))
+    return df[mask]
+
+
+def _last_row(year_file: str) -> Optional[Tuple[pd.Timestamp, int]]:
+    """(Start, индекс) последней записи файла года; читается только хвост файла"""
+    with open(year_file, encoding='utf-8') as f:
+        header = f.readline().rstrip('\r\n')
+    with open(year_file, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(f.tell() - 64 * 1024, 0))
+        tail = f.read().decode('utf-8', errors='replace').splitlines()
+    lines = [line for line in tail if line.strip()]
+    if not lines or lines[-1] == header:
+        return None
+    last = pd.read_csv(StringIO(header + '\n' + lines[-1]), index_col=0)
+    return pd.to_datetime(last['Start'].iloc[0], format=TIME_FORMAT), int(last.index[0])
+
+
+def drop_existing(year_file: str, rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Убирает из rows записи, которые уже есть в файле года (те же Start, End и Activity).
+    Нужна, когда у источника нет водяного знака, а time_YYYY.csv уже собран из его экспорта.
+    """
+    if not os.path.exists(year_file):
+        return rows
+    existing = pd.read_csv(year_file, usecols=['Start', 'End', 'Activity'], dtype=str, keep_default_na=False)
+    existing = pd.MultiIndex.from_frame(existing)
+    keys = pd.MultiIndex.from_arrays([rows['Start'].dt.strftime(TIME_FORMAT), rows['End'].dt.strftime(TIME_FORMAT),
+                                      rows['Activity'].astype(str)])
+    return rows[~keys.isin(existing)]
+
+
+def insert_sorted(year_file: str, rows: pd.DataFrame):
+    """
+    Вставляет записи в отсортированный по Start файл года без полной пересортировки.
+    Записи после последней записи файла просто дописываются в конец; иначе позиции
+    вставки находятся бинарным поиском по Start. Столбцы rows приводятся к заголовку файла.
+    """
+    rows = rows.sort_values('Start', kind='stable')
+
+    if not os.path.exists(year_file):
+        rows.reset_index(drop=True).to_csv(year_file, date_format=TIME_FORMAT)
+        return
+
+    existing_columns = pd.read_csv(year_file, index_col=0, nrows=0).columns
+    rows = rows.reindex(columns=existing_columns)
+
+    last = _last_row(year_file)
+    if last is None or rows['Start'].iloc[0] >= last[0]:
+        # Частый случай ежедневной синхронизации: все новые записи позже уже импортированных
+        first_index = 0 if last is None else last[1] + 1
+        rows.index = pd.RangeIndex(first_index, first_index + len(rows))
+        with open(year_file, 'a', newline='', encoding='utf-8') as f:
+            rows.to_csv(f, header=False, date_format=TIME_FORMAT)
+        return
+
+    existing = pd.read_csv(year_file, index_col=0)
+    starts = pd.to_datetime(existing['Start'], format=TIME_FORMAT)
+    positions = starts.searchsorted(rows['Start'], side='right')
+    rows.index = pd.RangeIndex(existing.index.max() + 1, existing.index.max() + 1 + len(rows))
+    rows = rows.assign(Start=rows['Start'].dt.strftime(TIME_FORMAT), End=rows['End'].dt.strftime(TIME_FORMAT))
+
+    pieces = []
+    previous = 0
+    for position, group in rows.groupby(positions, sort=True):
+        pieces.append(existing.iloc[previous:position])
+        pieces.append(group)
+        previous = position
+    pieces.append(existing.iloc[previous:])
+
+    temp_path = year_file + '.tmp'
+    pd.concat(pieces).to_csv(temp_path)
+    os.replace(temp_path, year_file)
+
+
+def import_new_rows(chunks: Iterable[pd.DataFrame], source: str, output_dir: str,
+                    state_file: Optional[str] = None) -> Dict[int, int]:
+    """
+    Инкрементальный импорт: из кусков экспорта (уже в формате Start, End, Activity, Total)
+    берутся только записи новее водяного знака источника и вставляются в output_dir/time_YYYY.csv.
+    Если водяного знака еще нет, записи, уже имеющиеся в time_YYYY.csv, пропускаются.
+    Возвращает число добавленных записей по годам.
+    """
+    state_file = state_path(output_dir, state_file)
+    state = ImportState(state_file)
+    watermark = state.get(source)
+    if state.has_pending(source):
+        print(f"{source}: полный импорт еще не слит в time_YYYY.csv — после merge_timedata "
+              f"файлы лет будут пересобраны из частей")
+    new = [newer_rows(chunk, watermark) for chunk in chunks]
+    new = pd.concat(new) if new else pd.DataFrame()
+
+    added = {}
+    skipped = 0
+    if not new.empty:
+        os.makedirs(output_dir, exist_ok=True)
+        with _write_lock:
+            for year, rows in new.groupby(new['Start'].dt.year):
+                year_file = os.path.join(output_dir, f'time_{year}.csv')
+                if watermark is None:
+                    fresh = drop_existing(year_file, rows)
+                    skipped += len(rows) - len(fresh)
+                    rows = fresh
+                if rows.empty:
+                    continue
+                insert_sorted(year_file, rows)
+                added[year] = len(rows)
+            # Перечитываем: другой источник мог обновить свой водяной знак
+            state = ImportState(state_file)
+            state.update(source, new)
+            state.save()
+
+    if skipped:
+        print(f"{source}: пропущено {skipped} записей, уже имеющихся в time_YYYY.csv")
+    print(f"{source}: добавлено {sum(added.values())} новых записей")
+    return added
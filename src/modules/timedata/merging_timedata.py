@@ -1,19 +1,142 @@
-import pandas as pd
+import csv
+import heapq
 import os.path
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+# Строки дат в формате TIME_FORMAT сортируются как сами даты
+from modules.timedata.TimeData import TIME_FORMAT
+from modules.timedata.incremental_import import merged_parts
+
+# Политики для пересекающихся записей из разных частей:
+#   keep  — оставить все записи как есть
+#   exact — убрать повторы интервала (одинаковые Start и End)
+#   trim  — обрезать начало записи по концу предыдущей, пересчитав Total; поглощенные записи убрать
+OVERLAP_POLICIES = ('keep', 'exact', 'trim')
+
+
+def _read_header(path: str) -> List[str]:
+    with open(path, newline='', encoding='utf-8') as f:
+        return next(csv.reader(f), [])
+
+
+def _is_sorted(path: str) -> bool:
+    """Проверяет, отсортирована ли часть по Start (потоково, без загрузки файла)"""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        start = next(reader).index('Start')
+        previous = ''
+        for row in reader:
+            if row[start] < previous:
+                return False
+            previous = row[start]
+    return True
+
 
-def merge_timedata(years=[2025], parts=[0, 1]):
+def _part_rows(path: str, columns: List[str]) -> Iterator[List[str]]:
+    """
+    Записи части по возрастанию Start, приведенные к столбцам columns. Отсортированная часть
+    читается потоково; неотсортированная загружается и сортируется целиком (запасной вариант).
+    """
+    if not _is_sorted(path):
+        print(f"Файл {path} не отсортирован по Start, сортируем в памяти")
+        df = pd.read_csv(path, dtype=str, keep_default_na=False, on_bad_lines="warn", sep=",")
+        df = df.sort_values('Start', kind='stable').reindex(columns=columns, fill_value='')
+        yield from df.values.tolist()
+        return
+
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = [header.index(column) if column in header else None for column in columns]
+        if positions == list(range(1, len(header))):
+            # Те же столбцы в том же порядке: отбрасываем только индекс
+            for row in reader:
+                yield row[1:]
+        else:
+            for row in reader:
+                yield [row[i] if i is not None else '' for i in positions]
+
+
+def _resolve_overlaps(rows: Iterator[List[str]], columns: List[str], overlap: str, stats: Dict[str, int]):
+    """Применяет политику overlap к записям, идущим по возрастанию Start"""
+    if overlap == 'keep':
+        yield from rows
+        return
+
+    start_i, end_i = columns.index('Start'), columns.index('End')
+    total_i = columns.index('Total') if 'Total' in columns else None
+    last_end = ''
+    current_start, seen = None, set()
+    for row in rows:
+        if overlap == 'exact':
+            if row[start_i] != current_start:
+                current_start, seen = row[start_i], set()
+            if row[end_i] in seen:
+                stats['dropped'] += 1
+                continue
+            seen.add(row[end_i])
+            yield row
+            continue
+
+        # trim
+        if row[end_i] <= last_end:
+            stats['dropped'] += 1
+            continue
+        if row[start_i] < last_end:
+            row = list(row)
+            row[start_i] = last_end
+            if total_i is not None:
+                start = datetime.strptime(row[start_i], TIME_FORMAT)
+                end = datetime.strptime(row[end_i], TIME_FORMAT)
+                row[total_i] = str(int((end - start).total_seconds() / 60))
+            stats['trimmed'] += 1
+        last_end = row[end_i]
+        yield row
+
+
+def merge_timedata(years=[2025], parts=[0, 1], folder: str = 'temp', overlap: str = 'keep',
+                   state_file: Optional[str] = None) -> Dict[int, Dict]:
+    """
+    Объединяет folder/time_YYYY_N.csv всех частей в folder/time_YYYY.csv.
+    Части читаются как отсортированные по Start потоки и сливаются через heapq.merge,
+    результат пишется по мере слияния — в памяти одновременно по записи из каждой части.
+    overlap: что делать с пересекающимися записями (см. OVERLAP_POLICIES)
+    После слияния водяные знаки полного импорта слитых частей вступают в силу (state_file,
+    по умолчанию folder/import_state.json).
+    Возвращает по годам число записанных, удаленных и обрезанных записей.
+    """
+    if overlap not in OVERLAP_POLICIES:
+        raise ValueError(f"Неизвестная политика пересечений: {overlap}")
+
+    report = {}
+    merged_years = {}
     for year in years:
-        cdf = None
-        for part in parts:
-            file = f'temp/time_{year}_{part}.csv'
-            if os.path.isfile(file):
-                df = pd.read_csv(file, on_bad_lines="warn", sep=",")
-                if cdf is not None:
-                    cdf = pd.concat([df, cdf])
-                else:
-                    cdf = df
-        cdf = cdf.reset_index()
-        cdf = cdf.sort_values('Start')
-        cdf = cdf.drop(columns="Unnamed: 0")
-        cdf = cdf.drop(columns="index")
-        cdf.to_csv(f'temp/time_{year}.csv')
+        # Более поздние части идут первыми — как при прежнем объединении
+        year_parts = [part for part in reversed(parts)
+                      if os.path.isfile(os.path.join(folder, f'time_{year}_{part}.csv'))]
+        files = [os.path.join(folder, f'time_{year}_{part}.csv') for part in year_parts]
+        if not files:
+            print(f"Нет файлов time_{year}_N.csv, пропускаем {year} год")
+            continue
+
+        columns = []
+        for file in files:
+            columns += [column for column in _read_header(file)[1:] if column not in columns]
+
+        stats = {'rows': 0, 'dropped': 0, 'trimmed': 0}
+        start = columns.index('Start')
+        merged = heapq.merge(*[_part_rows(file, columns) for file in files], key=lambda row: row[start])
+        with open(os.path.join(folder, f'time_{year}.csv'), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator=os.linesep)
+            writer.writerow([''] + columns)
+            for row in _resolve_overlaps(merged, columns, overlap, stats):
+                writer.writerow([stats['rows']] + row)
+                stats['rows'] += 1
+        report[year] = stats
+        for part in year_parts:
+            merged_years.setdefault(part, []).append(year)
+    merged_parts(merged_years, folder, state_file)
+    return report
@@ -1,34 +1,61 @@
-from flask import Flask, render_template, jsonify, request, redirect, url_for, Response
+from flask import Flask, render_template, jsonify, request, redirect, url_for, Response, abort
 import sys
 import os
 import pandas as pd
-import io
-import base64
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+import hashlib
+import multiprocessing
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import modules
 from modules.DataManager import DataManager
+from modules.ActivityInfo import activity_registry
+from modules.ChartCache import ChartCache
+from modules.mood.DaylioJournal import TREND_WINDOWS
+from modules.ChartRenderer import render_chart, chart_names, CHARTS, ChartRenderPool, ChartWarmer, \
+    default_charts
 
 # Импортируем конфигурацию
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from config import STATISTICS_FOLDER
+from config import STATISTICS_FOLDER, CACHE_FOLDER, LOAD_WORKERS, LAZY_LOADING, CHART_CACHE_SIZE, CHART_DISK_CACHE, \
+    CHART_DISK_CACHE_ITEMS, CHART_RENDER_WORKERS, CHART_RENDER_TIMEOUT, CHART_WARMUP, RELOAD_INTERVAL
 
 app = Flask(__name__)
 
-# Инициализируем менеджер данных при запуске приложения
-print("Загружаем данные из папки статистики...")
-data_manager = DataManager(STATISTICS_FOLDER)
-print("Загрузка данных завершена!")
+# Процессы пула отрисовки при запуске (spawn) заново импортируют этот модуль —
+# данные в них загружает сам пул, поэтому инициализацию приложения пропускаем
+IS_RENDER_WORKER = multiprocessing.parent_process() is not None
 
-# Генерируем файлы data2_YYYY.csv если они не существуют
-print("Проверяем и генерируем файлы data2_YYYY.csv...")
-data_manager.generate_data2_files()
-print("Генерация файлов data2 завершена!")
+# Перезагрузчик Flask (debug) запускает сервер в дочернем процессе, а модуль выполняет еще и в
+# наблюдающем родительском — в нем пул и прогрев не нужны (иначе графики рисуются дважды)
+DEBUG = True
+IS_RELOADER_PARENT = __name__ == '__main__' and DEBUG and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+
+if not IS_RENDER_WORKER:
+    # Инициализируем менеджер данных при запуске приложения
+    print("Загружаем данные из папки статистики...")
+    data_manager = DataManager(STATISTICS_FOLDER, max_workers=LOAD_WORKERS, lazy=LAZY_LOADING,
+                               cache_folder=CACHE_FOLDER)
+    print("Загрузка данных завершена!")
+
+    # Генерируем файлы data2_YYYY.csv если они не существуют
+    print("Проверяем и генерируем файлы data2_YYYY.csv...")
+    data_manager.generate_data2_files()
+    print("Генерация файлов data2 завершена!")
+
+    # Кэш отрисованных графиков; сбрасывается для года при перезагрузке его данных
+    chart_cache = ChartCache(
+        max_items=CHART_CACHE_SIZE,
+        disk_folder=os.path.join(data_manager.cache_folder, 'charts') if CHART_DISK_CACHE else None,
+        max_disk_items=CHART_DISK_CACHE_ITEMS,
+    )
+    data_manager.add_reload_listener(chart_cache.invalidate)
+
+    # Пул процессов отрисовки: графики страницы рисуются одновременно, готовые PNG пул сам кладет в кэш
+    render_pool = ChartRenderPool(STATISTICS_FOLDER, CHART_RENDER_WORKERS, on_result=chart_cache.put,
+                                  cache_folder=CACHE_FOLDER) \
+        if CHART_RENDER_WORKERS > 0 and not IS_RELOADER_PARENT else None
 
 def format_date(date):
     """Format date for JSON serialization"""
@@ -36,13 +63,62 @@ def format_date(date):
         return date.strftime('%Y-%m-%d')
     return date
 
-def get_plot_as_base64(fig):
-    """Convert matplotlib plot to base64 string"""
-    img = io.BytesIO()
-    fig.savefig(img, format='png', bbox_inches='tight')
-    img.seek(0)
-    plt.close(fig)
-    return base64.b64encode(img.getvalue()).decode()
+def get_chart_key(kind, year, chart):
+    """Ключ графика в кэше: меняется вместе с данными года (и цветами для графиков времени)"""
+    params = {}
+    if kind == 'time':
+        # Графики времени зависят еще и от файлов цветов активностей
+        params['colors'] = activity_registry.version()
+    return chart_cache.make_key(kind, year, chart, params, data_manager.get_version(kind, year))
+
+def get_chart_png(kind, year, chart):
+    """PNG графика: отрисовывается при первом запросе и после изменения данных, иначе берется из кэша"""
+    key = get_chart_key(kind, year, chart)
+    if render_pool is None:
+        return chart_cache.get_or_render(key, lambda: render_chart(data_manager, kind, year, chart))
+    # Если график уже рисуется (например, после prefetch_charts), ждем ту же задачу, но не дольше
+    # CHART_RENDER_TIMEOUT; в кэш результат кладет пул — один раз на задачу
+    return chart_cache.get_or_render(
+        key, lambda: render_pool.submit(key, kind, year, chart).result(timeout=CHART_RENDER_TIMEOUT),
+        store=False)
+
+def warm_chart(kind, year, chart):
+    """Прогрев графика: в пуле — фоновой задачей, которую обгоняют графики открытых страниц"""
+    if render_pool is None:
+        return get_chart_png(kind, year, chart)
+    key = get_chart_key(kind, year, chart)
+    return chart_cache.get_or_render(
+        key, lambda: render_pool.submit(key, kind, year, chart, background=True).result(), store=False)
+
+def prefetch_charts(charts, background=False):
+    """
+    Ставит в пул отрисовку всех графиков страницы, которых нет в кэше, не дожидаясь результата.
+    Готовые PNG сразу попадают в кэш, поэтому страница рисуется за время самого долгого графика.
+    background: поставить в фоновую очередь пула (прогрев)
+    """
+    if render_pool is None:
+        return
+    for kind, year, chart in charts:
+        key = get_chart_key(kind, year, chart)
+        if chart_cache.get(key) is None:
+            render_pool.submit(key, kind, year, chart, background=background)
+
+if not IS_RENDER_WORKER:
+    # Прогрев после загрузки данных и генерации data2: первый посетитель получает графики из кэша
+    warmer = ChartWarmer(lambda: default_charts(data_manager), warm_chart,
+                         lambda charts: prefetch_charts(charts, background=True))
+    if CHART_WARMUP and not IS_RELOADER_PARENT:
+        warmer.start()
+
+@app.before_request
+def reload_changed_data():
+    """Подхватывает измененные файлы статистики без перезапуска (не чаще раза в RELOAD_INTERVAL секунд)"""
+    if RELOAD_INTERVAL > 0:
+        data_manager.refresh_changed(min_interval=RELOAD_INTERVAL)
+
+def chart_url(kind, year, chart):
+    """Адрес отдельного изображения графика для шаблонов"""
+    return url_for('chart_image', kind=kind, year=year, chart=chart)
 
 @app.route('/')
 def index():
@@ -58,25 +134,23 @@ def mood_dashboard():
     
     try:
         # Получаем все доступные годы для настроения
-        mood_years = sorted(data_manager.mood_data.keys())
+        mood_years = data_manager.get_years('mood')
         
-        # Генерируем графики для каждого года
+        # Собираем адреса графиков для каждого года (сами графики отдает /chart/...)
         year_plots = {}
         for year in mood_years:
             try:
-                mood_data = data_manager.get_mood_data(year)
-                plot = mood_data.gen_plot(year=year)
-                trend_line = mood_data.gen_mood_trend_line(year=year)
-
                 year_plots[year] = {
-                    'plot': get_plot_as_base64(plot),
-                    'trend_line': get_plot_as_base64(trend_line),
+                    'plot': chart_url('mood', year, 'plot'),
+                    'trend_line': chart_url('mood', year, 'trend_line'),
                 }
             except Exception as e:
                 print(f"Ошибка при генерации графиков для {year} года: {str(e)}")
                 # Продолжаем с другими годами, если один не удался
                 continue
         
+        prefetch_charts([('mood', year, chart) for year in year_plots for chart in ('plot', 'trend_line')])
+
         if not year_plots:
             return render_template('no_data.html', data_type="настроения (ошибка генерации графиков)")
         
@@ -93,25 +167,23 @@ def time_dashboard():
     
     try:
         # Получаем все доступные годы для временных данных
-        time_years = sorted(data_manager.time_data.keys())
+        time_years = data_manager.get_years('time')
         
-        # Генерируем графики для каждого года
+        # Собираем адреса графиков для каждого года (сами графики отдает /chart/...)
         year_plots = {}
         for year in time_years:
             try:
-                time_data = data_manager.get_time_data(year)
-                daily = time_data.plot_daily()
-                plot1 = time_data.draw_plot("week", False)
-
                 year_plots[year] = {
-                    'daily': get_plot_as_base64(daily),
-                    'heatmap': get_plot_as_base64(plot1),
+                    'daily': chart_url('time', year, 'daily'),
+                    'heatmap': chart_url('time', year, 'heatmap'),
                 }
             except Exception as e:
                 print(f"Ошибка при генерации графиков для {year} года: {str(e)}")
                 # Продолжаем с другими годами, если один не удался
                 continue
         
+        prefetch_charts([('time', year, chart) for year in year_plots for chart in ('daily', 'heatmap')])
+
         if not year_plots:
             return render_template('no_data.html', data_type="времени (ошибка генерации графиков)")
         
@@ -128,31 +200,32 @@ def daily_dashboard():
     
     try:
         # Получаем все доступные годы для ежедневных данных
-        daily_years = sorted(data_manager.daily_data.keys())
+        daily_years = data_manager.get_years('daily')
+        daily_charts = []
         
-        # Генерируем графики для каждого года
+        # Собираем адреса графиков для каждого года (сами графики отдает /chart/...)
         year_plots = {}
         for year in daily_years:
             try:
-                daily_data = data_manager.get_daily_data(year)
-                
-                # Генерируем все графики из DailyData
-                figs = daily_data.plot_all()
-                
-                # Конвертируем все фигуры в base64 изображения
+                # По графику на каждый столбец DailyData: изображение и интерактивный график из /api/daily
                 images = []
-                for fig in figs:
-                    img = get_plot_as_base64(fig)
-                    images.append(img)
+                columns = []
+                for column in chart_names(data_manager, 'daily', year):
+                    images.append(chart_url('daily', year, column))
+                    columns.append((column, url_for('api_daily_column', year=year, column=column)))
+                    daily_charts.append(('daily', year, column))
                 
                 year_plots[year] = {
                     'images': images,
+                    'columns': columns,
                 }
             except Exception as e:
                 print(f"Ошибка при генерации графиков для {year} года: {str(e)}")
                 # Продолжаем с другими годами, если один не удался
                 continue
         
+        prefetch_charts(daily_charts)
+
         if not year_plots:
             return render_template('no_data.html', data_type="ежедневных данных (ошибка генерации графиков)")
         
@@ -161,6 +234,35 @@ def daily_dashboard():
         print(f"Ошибка при генерации графиков ежедневных данных: {str(e)}")
         return f"Ошибка при генерации графиков ежедневных данных: {str(e)}", 500
 
+@app.route('/chart/<kind>/<int:year>/<path:chart>.png')
+def chart_image(kind, year, chart):
+    """
+    Отдельное изображение графика с ETag/Last-Modified: неизменившийся график отдается как 304.
+    Название графика — path: столбцы ежедневных данных могут содержать '/' (например, 'Sport/Run')
+    """
+    if kind not in CHARTS and kind != 'daily':
+        abort(404)
+    if year not in data_manager.get_years(kind):
+        abort(404)
+
+    etag = hashlib.sha1(repr(get_chart_key(kind, year, chart)).encode('utf-8')).hexdigest()[:20]
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        try:
+            response = Response(get_chart_png(kind, year, chart), mimetype='image/png')
+        except KeyError:
+            abort(404)
+        except Exception as e:
+            print(f"Ошибка при генерации графика {kind}/{chart} за {year} год: {str(e)}")
+            return f"Ошибка при генерации графика: {str(e)}", 500
+
+    response.set_etag(etag)
+    response.last_modified = data_manager.get_last_modified(kind, year)
+    # Браузер хранит картинку, но перепроверяет ее при каждом открытии страницы
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
 @app.route('/time/report')
 def time_report():
     """Генерация и скачивание html-отчета по времени"""
@@ -170,18 +272,19 @@ def time_report():
     try:
         time_data = data_manager.get_time_data()
         
-        # Генерируем отчеты по неделям и месяцам
-        week_reports = time_data.generate_report(by='week')
-        month_reports = time_data.generate_report(by='month')
+        # Генерируем отчеты по неделям и месяцам из одной сводной таблицы
+        table = time_data.report_table()
+        week_reports = time_data.iter_report_views(table, by='week')
+        month_reports = time_data.iter_report_views(table, by='month')
         
         html = '<html><head><meta charset="utf-8"><title>Time Report</title></head><body>'
         html += '<h1>Time Report</h1>'
         
-        for year, df in week_reports.items():
+        for year, df in week_reports:
             html += f'<h2>Недели {year}</h2>'
             html += df.T.to_html(float_format="{:.2f}".format, border=1)
         
-        for year, df in month_reports.items():
+        for year, df in month_reports:
             html += f'<h2>Месяцы {year}</h2>'
             html += df.T.to_html(float_format="{:.2f}".format, border=1)
         
@@ -193,10 +296,106 @@ def time_report():
     except Exception as e:
         return f"Ошибка при генерации отчета: {str(e)}", 500
 
+def series_values(series):
+    """Значения pd.Series для JSON: NaN превращаются в null"""
+    return [None if pd.isna(value) else float(value) for value in series]
+
+def data_json(kind, year, build):
+    """
+    JSON с данными графика: кэшируется браузером по версии данных года, как и PNG.
+    build() возвращает словарь; KeyError/ValueError означают, что данных нет (404).
+    """
+    if year not in data_manager.get_years(kind):
+        abort(404)
+    etag = f"{kind}-{year}-{data_manager.get_version(kind, year)}"
+    if kind == 'time':
+        etag += f"-{activity_registry.version()}"
+    etag = hashlib.sha1(f"{etag}-{request.full_path}".encode('utf-8')).hexdigest()[:20]
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        try:
+            response = jsonify(build())
+        except (KeyError, ValueError):
+            abort(404)
+    response.set_etag(etag)
+    response.last_modified = data_manager.get_last_modified(kind, year)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/api/time/<int:year>/<by>')
+def api_time_totals(year, by):
+    """Часы по активностям за неделю или месяц (?work=0 — без рабочих активностей)"""
+    if by not in ('week', 'month'):
+        abort(404)
+    work = request.args.get('work', '1') != '0'
+
+    def build():
+        dfy, colors = data_manager.get_time_data(year).get_by_period(by, work)
+        return {
+            'year': year,
+            'by': by,
+            'periods': [int(period) for period in dfy.index],
+            'series': [
+                {'name': column, 'color': color, 'values': series_values(dfy[column].round(2))}
+                for column, color in zip(dfy.columns, colors)
+            ],
+        }
+    return data_json('time', year, build)
+
+@app.route('/api/mood/<int:year>/trend')
+def api_mood_trend(year):
+    """
+    Тренд настроения (скользящее среднее за ?window=30 дней) и перцентили оценок в том же окне.
+    Окно — одно из TREND_WINDOWS: ряды для каждого окна кэшируются в журнале
+    """
+    window = request.args.get('window', 30, type=int)
+    if window not in TREND_WINDOWS:
+        abort(400)
+
+    def build():
+        journal = data_manager.get_mood_data(year)
+        trend = journal.mood_trend(window, year)
+        bands = journal.mood_bands(window).reindex(trend.index)
+        return {
+            'year': year,
+            'window': window,
+            'dates': [format_date(date) for date in trend.index],
+            'values': series_values(trend.round(3)),
+            'bands': {column: series_values(bands[column].round(3)) for column in bands.columns},
+        }
+    return data_json('mood', year, build)
+
+@app.route('/api/daily/<int:year>/<path:column>')
+def api_daily_column(year, column):
+    """Значения одного столбца ежедневных данных по дням (название может содержать '/')"""
+    def build():
+        series = data_manager.get_daily_data(year).df[column]
+        return {
+            'year': year,
+            'column': column,
+            'dates': [format_date(date) for date in series.index],
+            'values': series_values(pd.to_numeric(series, errors='coerce')),
+        }
+    return data_json('daily', year, build)
+
+@app.route('/api/status')
+def api_status():
+    """Состояние фонового прогрева и кэша графиков"""
+    return jsonify({
+        'warmup': warmer.status(),
+        'chart_cache': chart_cache.stats(),
+    })
+
 @app.route('/api/summary')
 def api_summary():
     """API endpoint для получения сводки данных"""
-    return jsonify(data_manager.get_data_summary())
+    summary = data_manager.get_data_summary()
+    summary['activity_info'] = activity_registry.stats()
+    summary['load_report'] = data_manager.load_report
+    summary['chart_cache'] = chart_cache.stats()
+    summary['warmup'] = warmer.status()
+    return jsonify(summary)
 
 if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
+    app.run(debug=DEBUG) 
\ No newline at end of file
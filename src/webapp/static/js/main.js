@@ -32,4 +32,59 @@ async function fetchData(endpoint) {
         handleError(error);
         return null;
     }
-} 
\ No newline at end of file
+} 
+
+// Interactive charts drawn from the JSON data API.
+// Hook: <div class="api-chart" data-chart="time-totals" data-src="/api/time/2024/week"></div>
+const apiCharts = {
+    'time-totals': data => ({
+        traces: data.series.map(series => ({
+            x: data.periods,
+            y: series.values,
+            name: series.name,
+            type: 'scatter',
+            mode: 'lines',
+            fill: 'tozeroy',
+            line: { width: 0, color: series.color }
+        })),
+        layout: { title: `${data.year}`, xaxis: { title: data.by }, yaxis: { title: 'Часы' } }
+    }),
+    'mood-trend': data => ({
+        traces: [
+            { x: data.dates, y: data.bands.p10, name: '10-й перцентиль', type: 'scatter', mode: 'lines',
+              line: { width: 0 }, showlegend: false },
+            { x: data.dates, y: data.bands.p90, name: '10–90 перцентили', type: 'scatter', mode: 'lines',
+              line: { width: 0 }, fill: 'tonexty', fillcolor: 'rgba(0, 0, 255, 0.1)' },
+            { x: data.dates, y: data.values, name: 'Тренд настроения', type: 'scatter', mode: 'lines',
+              line: { width: 2, color: 'blue' } }
+        ],
+        layout: {
+            title: `Тренд настроения за ${data.year} год (окно ${data.window} дней)`,
+            yaxis: { title: 'Оценка настроения', range: [0, 5] }
+        }
+    }),
+    'daily-column': data => ({
+        traces: [{ x: data.dates, y: data.values, name: data.column, type: 'bar' }],
+        layout: { title: data.column }
+    })
+};
+
+// Draws charts that are visible inside root; hidden years are drawn when shown
+async function drawApiCharts(root = document) {
+    const elements = root.querySelectorAll('.api-chart:not([data-drawn])');
+    for (const element of elements) {
+        if (element.offsetParent === null) {
+            continue;
+        }
+        element.dataset.drawn = 'true';
+        const data = await fetchData(element.dataset.src);
+        if (!data) {
+            element.textContent = 'Не удалось загрузить данные графика';
+            continue;
+        }
+        const { traces, layout } = apiCharts[element.dataset.chart](data);
+        Plotly.newPlot(element, traces, layout, chartConfig);
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => drawApiCharts());